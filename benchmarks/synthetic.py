@@ -0,0 +1,109 @@
+"""
+Synthetic tables for the benchmarks.
+
+Every table is generated from a fixed seed so that results can be compared
+across machines without shipping data files.
+"""
+import resource
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from dataframe_image._timing import child_rss
+
+WORDS = [
+    "alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel",
+    "india", "juliett", "kilo", "lima", "mike", "november", "oscar", "papa",
+]
+
+
+def make_frame(rows, cols, seed=0):
+    """
+    Return a DataFrame with `rows` rows and `cols` columns cycling through
+    float, int, string and datetime columns.
+    """
+    rng = np.random.RandomState(seed)
+    data = {}
+    for i in range(cols):
+        kind = i % 4
+        if kind == 0:
+            values = rng.normal(0, 1000, rows)
+        elif kind == 1:
+            values = rng.randint(-10_000, 10_000, rows)
+        elif kind == 2:
+            values = [" ".join(rng.choice(WORDS, 2)) for _ in range(rows)]
+        else:
+            values = pd.Timestamp("2020-01-01") + pd.to_timedelta(
+                rng.randint(0, 365 * 24 * 60, rows), unit="min"
+            )
+        data[f"col_{i}"] = values
+    return pd.DataFrame(data)
+
+
+def make_styler(rows, cols, seed=0):
+    """Return `make_frame` styled with a background gradient on numeric columns."""
+    df = make_frame(rows, cols, seed)
+    return df.style.background_gradient(subset=df.select_dtypes("number").columns)
+
+
+def reset_peak_rss():
+    """Reset the peak RSS of this process where the platform allows it."""
+    if sys.platform.startswith("linux"):
+        try:
+            with open("/proc/self/clear_refs", "w") as f:
+                f.write("5")
+        except OSError:
+            pass
+
+
+def peak_rss_mb():
+    """Return the peak RSS in MiB of this process."""
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    if sys.platform.startswith("linux"):
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    own = int(line.split()[1]) / 1024
+    return own
+
+
+class ChildPeakRSS:
+    """
+    Poll the total RSS of the child processes, e.g. a headless browser and
+    its renderers, while the block runs. Unlike RUSAGE_CHILDREN, which keeps
+    the peak of every child the process ever waited for, this only covers
+    the block. `mb` is None where /proc is not available.
+    """
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._poll, daemon=True)
+
+    def __enter__(self):
+        if Path("/proc/self/stat").exists():
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _poll(self):
+        while True:
+            self.peak = max(self.peak, child_rss())
+            if self._stop.wait(self.interval):
+                break
+
+    @property
+    def mb(self):
+        if not self._thread.ident:
+            return None
+        return self.peak / (1024 * 1024)
@@ -0,0 +1,75 @@
+"""
+Benchmarks of `dataframe_image.export` for every converter.
+
+Run with `pytest benchmarks --benchmark-only`, select a subset with `-k`,
+e.g. `-k "matplotlib and 100x10"`. Besides the wall time, each result
+records the peak RSS of the process and of browser child processes and the
+size of the exported image in `extra_info`. Converters whose backend is not
+installed are skipped.
+"""
+import io
+
+import pytest
+from synthetic import (
+    ChildPeakRSS,
+    make_frame,
+    make_styler,
+    peak_rss_mb,
+    reset_peak_rss,
+)
+
+import dataframe_image as dfi
+
+pytest.importorskip("pytest_benchmark")
+
+CONVERTERS = ["chrome", "playwright", "selenium", "html2image", "matplotlib"]
+SIZES = [(5, 5), (100, 10), (500, 20), (2000, 50)]
+DPIS = [100, 200, 300]
+INPUTS = {"plain": make_frame, "styler": make_styler}
+
+_unavailable = {}
+
+
+def require_converter(converter):
+    """Skip when a tiny export fails, e.g. because the backend is missing."""
+    if converter not in _unavailable:
+        try:
+            dfi.export(make_frame(1, 1), io.BytesIO(), table_conversion=converter)
+            _unavailable[converter] = None
+        except Exception as ex:
+            _unavailable[converter] = f"{type(ex).__name__}: {ex}"
+    if _unavailable[converter]:
+        pytest.skip(f"{converter} is not available ({_unavailable[converter]})")
+
+
+@pytest.mark.parametrize("dpi", DPIS)
+@pytest.mark.parametrize("size", SIZES, ids=[f"{r}x{c}" for r, c in SIZES])
+@pytest.mark.parametrize("kind", INPUTS)
+@pytest.mark.parametrize("converter", CONVERTERS)
+def test_export(benchmark, converter, kind, size, dpi):
+    require_converter(converter)
+    obj = INPUTS[kind](*size)
+    buffers = []
+
+    def setup():
+        buffers.append(io.BytesIO())
+        return (obj, buffers[-1]), {}
+
+    def export(obj, buffer):
+        dfi.export(
+            obj,
+            buffer,
+            max_rows=-1,
+            max_cols=-1,
+            table_conversion=converter,
+            dpi=dpi,
+        )
+
+    reset_peak_rss()
+    # large tables take seconds per export, a few rounds are enough
+    with ChildPeakRSS() as children:
+        benchmark.pedantic(export, setup=setup, rounds=3)
+    benchmark.extra_info["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    if children.mb is not None:
+        benchmark.extra_info["children_peak_rss_mb"] = round(children.mb, 1)
+    benchmark.extra_info["output_bytes"] = len(buffers[-1].getvalue())
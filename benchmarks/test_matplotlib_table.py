@@ -0,0 +1,21 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dataframe_image.converter.matplotlib_table import MatplotlibTableConverter
+from dataframe_image.pd_html import styler2html
+
+pytest.importorskip("pytest_benchmark")
+
+NUM_COLS = 10
+
+
+@pytest.mark.parametrize("cells", [100, 1_000, 10_000])
+def test_print_table(benchmark, cells):
+    df = pd.DataFrame(np.random.RandomState(0).rand(cells // NUM_COLS, NUM_COLS))
+    html = styler2html(df.style.background_gradient())
+    converter = MatplotlibTableConverter(
+        fontsize=14, encode_base64=False, for_document=False
+    )
+    converter.run(html)
+    benchmark(converter.print_table)
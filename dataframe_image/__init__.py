@@ -1,4 +1,5 @@
-from ._pandas_accessor import export, export_async
+from ._pandas_accessor import export, export_async, export_pages
+from ._timing import ExportStats, collect_stats
 from ._version import __version__
 
 
@@ -14,4 +15,12 @@ def convert(*args, **kwargs):
 		raise
 	return _convert(*args, **kwargs)
 
-__all__ = ["export", "export_async", "convert", "__version__"]
\ No newline at end of file
+__all__ = [
+    "export",
+    "export_async",
+    "export_pages",
+    "collect_stats",
+    "ExportStats",
+    "convert",
+    "__version__",
+]
\ No newline at end of file
@@ -0,0 +1,42 @@
+import asyncio
+import contextvars
+import functools
+import os
+import weakref
+
+# semaphore limiting the concurrent exports of each event loop
+_export_semaphores = weakref.WeakKeyDictionary()
+
+
+async def to_thread(func, *args, **kwargs):
+    """
+    Run the blocking `func` in the default executor of the running loop, in
+    a copy of the current context so phases are timed by the caller's
+    collector. Same as `asyncio.to_thread`, which needs python 3.9.
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+    return await loop.run_in_executor(None, call)
+
+
+def max_concurrent_exports():
+    """
+    Number of exports `export_async` runs at the same time, set with the
+    DFI_MAX_CONCURRENT_EXPORTS environment variable. Defaults to the number
+    of CPUs, at most 4, as every export runs a browser or draws with
+    matplotlib.
+    """
+    value = os.environ.get("DFI_MAX_CONCURRENT_EXPORTS")
+    if value:
+        return max(1, int(value))
+    return min(4, os.cpu_count() or 1)
+
+
+def export_semaphore():
+    """The semaphore limiting the concurrent exports of the running loop."""
+    loop = asyncio.get_running_loop()
+    semaphore = _export_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(max_concurrent_exports())
+        _export_semaphores[loop] = semaphore
+    return semaphore
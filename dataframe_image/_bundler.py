@@ -1,6 +1,23 @@
-import base64
+import io
+import multiprocessing
+import os
+import time
+import urllib.parse
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
+from tempfile import SpooledTemporaryFile
+from zipfile import ZIP_DEFLATED, ZipFile
 
+# size of each chunk written to the response
+CHUNK_SIZE = 1024 * 1024
+# archives larger than this are spooled to a temporary file instead of memory
+SPOOL_MAX_SIZE = 64 * 1024 * 1024
+# number of notebooks converted at the same time
+MAX_WORKERS = int(os.environ.get("DFI_BUNDLER_WORKERS", 2))
+# seconds a finished job is kept around waiting to be downloaded
+JOB_TTL = 3600
 
 
 def _jupyter_bundlerextension_paths():
@@ -14,9 +31,7 @@ def _jupyter_bundlerextension_paths():
     ]
 
 
-def convert(model, handler):
-    from ._convert import Converter
-
+def get_convert_kwargs(model, handler):
     arguments = [
         "to",
         "use",
@@ -49,7 +64,25 @@ def convert(model, handler):
     kwargs["chrome_path"] = kwargs["chrome_path"] or None
     kwargs["latex_command"] = [tag.strip() for tag in kwargs["latex_command"].split()]
     kwargs["output_dir"] = None
+    kwargs["no_input"] = False
     kwargs["web_app"] = True
+    return kwargs
+
+
+class ConversionResult:
+    """picklable summary of a finished conversion, sent back from the worker"""
+
+    def __init__(self, document_name, to, return_data, success, error_msg=None):
+        self.document_name = document_name
+        self.to = to
+        self.return_data = return_data
+        self.success = success
+        self.error_msg = error_msg
+
+
+def run_conversion(kwargs):
+    """Run a notebook conversion. Executed inside a worker process."""
+    from ._convert import Converter
 
     try:
         converter = Converter(**kwargs)
@@ -62,56 +95,153 @@ def convert(model, handler):
         tb = traceback.format_exc()
         msg = error + f"\n\n{tb}"
         msg = msg.replace("\n", "<br>")
+        document_name = kwargs["document_name"] or Path(kwargs["filename"]).stem
+        return ConversionResult(document_name, None, {}, False, msg)
 
-        converter.success = False
-        converter.error_msg = msg
-    else:
-        if "pdf_data" in converter.return_data or "md_data" in converter.return_data:
-            converter.success = True
-        else:
-            converter.success = False
-            converter.error_msg = "Error: \n" + str(converter.return_data)
+    data = converter.return_data
+    if "pdf_data" in data or "md_data" in data:
+        return ConversionResult(converter.document_name, converter.to, data, True)
+    return ConversionResult(
+        converter.document_name, converter.to, data, False, "Error: \n" + str(data)
+    )
+
+
+class ConversionJob:
+    def __init__(self, future):
+        self.future = future
+        self.submitted = time.monotonic()
+        self.finished = None
+
+    def status(self):
+        if not self.future.done():
+            return "running" if self.future.running() else "queued"
+        if self.finished is None:
+            self.finished = time.monotonic()
+        if self.future.exception() is None and self.future.result().success:
+            return "done"
+        return "failed"
+
+    def elapsed(self):
+        end = self.finished if self.finished is not None else time.monotonic()
+        return round(end - self.submitted, 1)
+
+    def result(self):
+        try:
+            return self.future.result()
+        except Exception as e:
+            # the worker process itself died, e.g. killed for running out of memory
+            return ConversionResult(
+                None, None, {}, False, f"{type(e).__name__}: {str(e)}"
+            )
+
+
+_executor = None
+_jobs = {}
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        # spawn rather than fork the jupyter server with its running event loop
+        _executor = ProcessPoolExecutor(
+            max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
 
-    return converter
+
+def _prune_jobs():
+    now = time.monotonic()
+    for job_id, job in list(_jobs.items()):
+        job.status()
+        if job.finished is not None and now - job.finished > JOB_TTL:
+            del _jobs[job_id]
+
+
+def submit_job(kwargs):
+    global _executor
+    _prune_jobs()
+    job_id = uuid.uuid4().hex
+    try:
+        future = _get_executor().submit(run_conversion, kwargs)
+    except BrokenProcessPool:
+        # a worker died and took the pool with it, start a new one
+        _executor = None
+        future = _get_executor().submit(run_conversion, kwargs)
+    _jobs[job_id] = ConversionJob(future)
+    return job_id
+
+
+def get_job_status(job_id):
+    job = _jobs.get(job_id)
+    if job is None:
+        return {"job_id": job_id, "status": "unknown"}
+    status = job.status()
+    info = {"job_id": job_id, "status": status, "elapsed": job.elapsed()}
+    if status == "queued":
+        queued = [j for j in _jobs.values() if j.status() == "queued"]
+        queued.sort(key=lambda j: j.submitted)
+        info["position"] = queued.index(job) + 1
+    return info
 
 
 def read_static_file(name):
     mod_path = Path(__file__).parent
-    html_path = mod_path / "static" / name
+    html_path = mod_path / "converter" / "browser" / "static" / name
     return open(html_path).read()
 
 
-def get_js(converter):
+def get_download(converter):
+    """
+    Build the file offered for download without touching the server's cwd.
+
+    Returns a tuple of (file object positioned at the start, download filename,
+    content type). Archives larger than ``SPOOL_MAX_SIZE`` spill over to a
+    temporary file instead of being held in memory.
+    """
     fn = converter.document_name
     data = converter.return_data
 
     if converter.to == {"pdf_latex"} or converter.to == {"pdf_browser"}:
-        app_type = "pdf"
-        s = base64.b64encode(data["pdf_data"]).decode()
-    else:
-        app_type = "zip"
-        from zipfile import ZIP_DEFLATED, ZipFile
-
-        with ZipFile(f"{fn}.zip", "w", compression=ZIP_DEFLATED) as zf:
-            if "md_data" in data:
-                zf.writestr(f"{fn}.md", data["md_data"])
-                image_dir_name = Path(data["image_dir_name"])
-                for image_fn, val in data["md_images"].items():
-                    image_final_fn = str(image_dir_name / image_fn)
-                    zf.writestr(image_final_fn, val)
-            if "pdf_data" in data:
-                zf.writestr(f"{fn}.pdf", data["pdf_data"])
-
-        with open(f"{fn}.zip", "rb") as zf:
-            s = base64.b64encode(zf.read()).decode()
-
-    js = read_static_file("download.html").format(s=s, filename=fn, app_type=app_type)
-    return js
-
-
-# synchronous execution - maybe change so other notebook commands can be executed
+        return io.BytesIO(data["pdf_data"]), f"{fn}.pdf", "application/pdf"
+
+    fileobj = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    with ZipFile(fileobj, "w", compression=ZIP_DEFLATED) as zf:
+        if "md_data" in data:
+            zf.writestr(f"{fn}.md", data["md_data"])
+            image_dir_name = Path(data["image_dir_name"])
+            for image_fn, val in data["md_images"].items():
+                image_final_fn = str(image_dir_name / image_fn)
+                zf.writestr(image_final_fn, val)
+        if "pdf_data" in data:
+            zf.writestr(f"{fn}.pdf", data["pdf_data"])
+    fileobj.seek(0)
+    return fileobj, f"{fn}.zip", "application/zip"
+
+
+def write_download(handler, converter):
+    """stream the converted document to the client as a binary attachment"""
+    fileobj, filename, content_type = get_download(converter)
+    handler.set_header("Content-Type", content_type)
+    handler.set_header(
+        "Content-Disposition",
+        f"attachment; filename*=UTF-8''{urllib.parse.quote(filename)}",
+    )
+    with fileobj:
+        while True:
+            chunk = fileobj.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            handler.write(chunk)
+            handler.flush()
+
+
 def bundle(handler, model):
     """
+    Conversions run in a bounded pool of worker processes so the notebook
+    server's event loop is never blocked. Submitting the form queues a job
+    and returns a page that polls the job's status and downloads the
+    result when it is ready.
+
     Parameters
     ----------
     handler : tornado.web.RequestHandler
@@ -120,16 +250,30 @@ def bundle(handler, model):
         Notebook model from the configured ContentManager
     """
     app_status = handler.get_query_argument("app_status", None)
+    job_id = handler.get_query_argument("job_id", None)
 
     if app_status is None:
         html = read_static_file("form.html")
         handler.write(html)
     elif app_status == "waiting":
-        converter = convert(model, handler)
-        if converter.success:
-            js = get_js(converter)
-            handler.write(js)
-        else:
-            html = read_static_file("fail.html").format(error_msg=converter.error_msg)
+        job_id = submit_job(get_convert_kwargs(model, handler))
+        html = read_static_file("progress.html").format(job_id=job_id)
+        handler.write(html)
+    elif app_status == "status":
+        handler.write(get_job_status(job_id))
+    elif app_status == "download":
+        job = _jobs.get(job_id)
+        if job is None or not job.future.done():
+            handler.set_status(404)
+            error_msg = f"No finished conversion job with id {job_id}"
+            html = read_static_file("fail.html").format(error_msg=error_msg)
             handler.write(html)
+        else:
+            del _jobs[job_id]
+            result = job.result()
+            if result.success:
+                write_download(handler, result)
+            else:
+                html = read_static_file("fail.html").format(error_msg=result.error_msg)
+                handler.write(html)
     handler.finish()
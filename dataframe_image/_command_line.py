@@ -93,6 +93,14 @@ Optional Keyword Arguments
     True, it will be saved here as well. Provide a relative path to the 
     current working directory or an absolute path.
 
+--profile
+    Print a report of the time spent in each conversion step, in each 
+    cell and rendering each table to stderr, with the slowest tables and 
+    their shapes.
+
+--profile-output
+    Path of a JSON file to also write the profiling report to.
+
 
 Examples
 ========
@@ -128,6 +136,8 @@ parser.add_argument(
 )
 parser.add_argument("--output-dir")
 parser.add_argument("--no-input", action="store_true")
+parser.add_argument("--profile", action="store_true")
+parser.add_argument("--profile-output")
 
 
 def main():
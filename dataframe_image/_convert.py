@@ -1,9 +1,13 @@
+import hashlib
 import io
 import logging
 import os
+import re
 import shutil
 import urllib.parse
 import warnings
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from pathlib import Path
 from tempfile import TemporaryDirectory
 
@@ -18,6 +22,10 @@ from ._preprocessors import (
     NoExecuteDataFramePreprocessor,
     PdfLatexPreprocessor,
 )
+from ._kernel_pool import get_kernel_pool
+from ._notebook import read_notebook
+from ._profile import ConversionProfile
+from ._timing import collect_stats, log_stats
 
 _logger = logging.getLogger(__name__)
 
@@ -54,6 +62,9 @@ class Converter:
         no_input,
         web_app,
         nbconvert_config=None,
+        profile=False,
+        profile_output=None,
+        kernel_pool_size=None,
     ):
         self.filename = Path(filename)
         self.use = use
@@ -74,11 +85,16 @@ class Converter:
 
         self.document_name = self.get_document_name(document_name)
         self.execute = execute
+        if kernel_pool_size is None:
+            kernel_pool_size = int(os.environ.get("DFI_KERNEL_POOL_SIZE", 0))
+        self.kernel_pool_size = kernel_pool_size
         self.save_notebook = save_notebook
         self.final_nb_home = self.get_new_notebook_home(output_dir)
         self.image_dir_name = self.nb_name + "_files"
 
         self.return_data = {}
+        self.profile = ConversionProfile(self.filename.name) if profile else None
+        self.profile_output = profile_output
         self.resources = self.get_resources()
 
         if nbconvert_config is None:
@@ -158,13 +174,8 @@ class Converter:
             return latex_command
 
     def get_notebook(self):
-        with open(self.filename) as f:
-            nb = nbformat.read(f, as_version=4)
-
-        if isinstance(self.limit, int):
-            nb["cells"] = nb["cells"][: self.limit]
-
-        return nb
+        limit = self.limit if isinstance(self.limit, int) else None
+        return read_notebook(self.filename, limit)
 
     def get_document_name(self, document_name):
         if document_name:
@@ -208,6 +219,9 @@ class Converter:
 
             converter = MatplotlibTableConverter(fontsize=22).run
 
+        if self.profile is not None:
+            converter = self.profile.wrap_converter(converter)
+
         resources = {
             "metadata": {"path": str(self.nb_home), "name": self.document_name},
             "converter": converter,
@@ -218,10 +232,10 @@ class Converter:
     def get_code_to_run(self):
         code = (
             "import pandas as pd;"
-            "from dataframe_image._screenshot import make_repr_png;"
+            "from dataframe_image._kernel_renderer import make_repr_png;"
             f"_repr_png_ = make_repr_png(center_df={self.center_df}, "
             f"max_rows={self.max_rows}, max_cols={self.max_cols}, "
-            f"chrome_path={self.chrome_path});"
+            f"chrome_path={self.chrome_path!r});"
             "pd.DataFrame._repr_png_ = _repr_png_;"
             "from pandas.io.formats.style import Styler;"
             "Styler._repr_png_ = _repr_png_;"
@@ -237,12 +251,38 @@ class Converter:
             else:
                 extra_arguments = []
             pp = ExecutePreprocessor(allow_errors=True, extra_arguments=extra_arguments)
-            pp.preprocess(self.nb, self.resources)
+            if self.kernel_pool_size:
+                kernel_name = self.nb.metadata.get("kernelspec", {}).get("name")
+                pool = get_kernel_pool(
+                    kernel_name or "python3", extra_arguments, self.kernel_pool_size
+                )
+                with pool.acquire(self.nb_home) as km:
+                    try:
+                        pp.preprocess(self.nb, self.resources, km=km)
+                    finally:
+                        # nbclient keeps the channels of kernels it does not own open
+                        if pp.kc is not None:
+                            pp.kc.stop_channels()
+            else:
+                pp.preprocess(self.nb, self.resources)
+            if self.profile is not None:
+                self.profile.add_execution_times(self.nb)
 
     def no_execute_preprocess(self):
         if not self.execute or self.table_conversion == "matplotlib":
-            NoExecuteDataFramePreprocessor().preprocess(self.nb, self.resources)
-        ChangeOutputTypePreprocessor().preprocess(self.nb, self.resources)
+            self.preprocess(NoExecuteDataFramePreprocessor())
+        self.preprocess(ChangeOutputTypePreprocessor())
+
+    def preprocess(self, preprocessor):
+        if self.profile is None:
+            preprocessor.preprocess(self.nb, self.resources)
+        else:
+            self.profile.preprocess(preprocessor, self.nb, self.resources)
+
+    def step(self, name):
+        if self.profile is None:
+            return nullcontext()
+        return self.profile.step(name)
 
     def to_md(self):
         me = MarkdownExporter(
@@ -258,10 +298,11 @@ class Converter:
             **self.resources["outputs"],
             **self.resources["image_data_dict"],
         }
-        for filename, image_data in image_data_dict.items():
-            new_filename = str(Path(self.image_dir_name) / filename)
-            new_filename = urllib.parse.quote(new_filename)
-            md_data = md_data.replace(filename, new_filename)
+        links = {
+            filename: urllib.parse.quote(str(Path(self.image_dir_name) / filename))
+            for filename in image_data_dict
+        }
+        md_data = replace_all(md_data, links)
 
         if self.web_app:
             self.return_data["md_data"] = md_data
@@ -269,13 +310,7 @@ class Converter:
             self.return_data["image_dir_name"] = self.image_dir_name
         else:
             image_dir = self.final_nb_home / self.image_dir_name
-            if image_dir.is_dir():
-                shutil.rmtree(image_dir)
-            image_dir.mkdir()
-
-            for filename, value in image_data_dict.items():
-                with open(image_dir / filename, "wb") as f:
-                    f.write(value)
+            sync_directory(image_dir, image_data_dict)
 
             fn = self.final_nb_home / (self.document_name + ".md")
             with open(fn, mode="w", encoding="utf-8") as f:
@@ -370,8 +405,18 @@ class Converter:
             nbformat.write(nb, file)
 
     def convert(self):
+        # profiling also accounts the memory of the kernel and the browser
+        with collect_stats(resources=True if self.profile else None) as stats:
+            self.run_steps()
+        log_stats(stats, "convert")
+        if self.profile is not None:
+            self.profile.stats = stats
+            self.profile.write(self.profile_output)
+
+    def run_steps(self):
         # Step 1: execute notebook if required
-        self.execute_notebook()
+        with self.step("execute_notebook"):
+            self.execute_notebook()
         # Step 2: if exporting as pdf with browser, do this first
         # as it requires no other preprocessing
         if "pdf_browser" in self.to:
@@ -382,27 +427,99 @@ class Converter:
                 "`jupyter nbconvert --to WebPDF --allow-chromium-download notebook.ipynb`",
                 DeprecationWarning,
             )
-            self.to_pdf_browser()
+            with self.step("to_pdf_browser"):
+                self.to_pdf_browser()
 
         if "md" in self.to or "pdf_latex" in self.to:
             # Step 3: If converting to markdown or latex_pdf, do no execute preprocessing
             # This will also change the output type for images with ChangeOutputTypePreprocessor
-            self.no_execute_preprocess()
+            with self.step("no_execute_preprocess"):
+                self.no_execute_preprocess()
             # Step 4: Save notebook if necessary before processing markdown
-            self.save_notebook_to_file()
+            with self.step("save_notebook_to_file"):
+                self.save_notebook_to_file()
             # Step 5: Preprocess markdown table
             if "md" in self.to:
-                MarkdownPreprocessor().preprocess(self.nb, self.resources)
+                pp = MarkdownPreprocessor()
             else:
-                PdfLatexPreprocessor().preprocess(self.nb, self.resources)
+                pp = PdfLatexPreprocessor()
+            with self.step(type(pp).__name__):
+                self.preprocess(pp)
             # Step 6 Remove converter from resources - nbconvert cannot copy matplotlib transform object
             self.resources.pop("converter")
             # Step 7: Convert to markdown if required
             if "md" in self.to:
-                self.to_md()
+                with self.step("to_md"):
+                    self.to_md()
             # Step 8: Convert to pdf via latex if required
             if "pdf_latex" in self.to:
-                self.to_pdf_latex()
+                with self.step("to_pdf_latex"):
+                    self.to_pdf_latex()
+
+
+def replace_all(text, replacements):
+    """
+    Replace every key of `replacements` in `text` by its value in one pass.
+    Longer keys win over keys they contain, replaced text is not searched
+    again.
+    """
+    if not replacements:
+        return text
+    keys = sorted(replacements, key=len, reverse=True)
+    pattern = re.compile("|".join(map(re.escape, keys)))
+    return pattern.sub(lambda match: replacements[match.group(0)], text)
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(2**20), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def write_if_changed(path, data):
+    """Write `data` to `path` unless the file holds these bytes. Returns whether it wrote."""
+    try:
+        unchanged = path.stat().st_size == len(data) and (
+            file_digest(path) == hashlib.sha256(data).digest()
+        )
+    except FileNotFoundError:
+        unchanged = False
+    if unchanged:
+        return False
+    with open(path, "wb") as f:
+        f.write(data)
+    return True
+
+
+def sync_directory(directory, files):
+    """
+    Make `directory` contain exactly `files`, a dict of file name -> bytes.
+    Files are written in parallel and only when their bytes changed, so
+    the modification times of unchanged files are kept, and other entries
+    are deleted.
+    """
+    directory.mkdir(exist_ok=True)
+    for path in directory.iterdir():
+        if path.name not in files:
+            if path.is_dir() and not path.is_symlink():
+                shutil.rmtree(path)
+            else:
+                path.unlink()
+    with ThreadPoolExecutor() as executor:
+        written = sum(
+            executor.map(
+                lambda item: write_if_changed(directory / item[0], item[1]),
+                files.items(),
+            )
+        )
+    _logger.debug(
+        "Wrote %d of %d files to %s, the others are unchanged",
+        written,
+        len(files),
+        directory,
+    )
 
 
 def convert(
@@ -421,6 +538,9 @@ def convert(
     latex_command=None,
     output_dir=None,
     no_input=False,
+    profile=False,
+    profile_output=None,
+    kernel_pool_size=None,
 ):
     """
     Convert a Jupyter Notebook to pdf or markdown using images for pandas
@@ -507,6 +627,24 @@ def convert(
         this will be the same directory as the notebook. The directory
         for images will also be created in here. If `save_notebook` is set to
         True, it will be saved here as well. Provide a relative or absolute path.
+
+    profile : bool, default False
+        Print a report of the time spent in each conversion step, in each
+        cell and rendering each table to stderr, with the slowest tables and
+        their shapes. Use it to find the tables that dominate conversion time.
+
+    profile_output : str, default None
+        Path of a JSON file to also write the profiling report to. Only used
+        when `profile` is True.
+
+    kernel_pool_size : int, default None
+        Number of kernels kept running to execute notebooks when `execute`
+        is True. Notebooks converted one after the other reuse the kernels,
+        which skips starting a kernel and importing libraries again. The
+        variables of the previous notebook are deleted with `%reset -f` and
+        the kernel changes to the directory of the new notebook. Imported
+        modules are not reloaded. When None, the DFI_KERNEL_POOL_SIZE
+        environment variable is used. 0 starts a new kernel per notebook.
     """
     c = Converter(
         filename,
@@ -525,5 +663,8 @@ def convert(
         output_dir,
         no_input,
         web_app=False,
+        profile=profile,
+        profile_output=profile_output,
+        kernel_pool_size=kernel_pool_size,
     )
     c.convert()
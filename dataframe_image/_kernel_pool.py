@@ -0,0 +1,174 @@
+import atexit
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from .logger import logger
+
+# run in a pooled kernel before every notebook it executes
+RESET_CODE = (
+    "get_ipython().run_line_magic('reset', '-f');"
+    "import os as _dfi_os;"
+    "_dfi_os.chdir({path!r});"
+    "del _dfi_os"
+)
+# seconds to wait for a kernel to start or to reset
+KERNEL_TIMEOUT = 60
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PooledKernel:
+    """A started kernel of the pool."""
+
+    def __init__(self, kernel_name, extra_arguments):
+        from jupyter_client import KernelManager
+
+        self.km = KernelManager(kernel_name=kernel_name)
+        self.km.start_kernel(extra_arguments=extra_arguments)
+        try:
+            with self.client() as kc:
+                kc.wait_for_ready(timeout=KERNEL_TIMEOUT)
+        except Exception:
+            self.shutdown()
+            raise
+
+    @contextmanager
+    def client(self):
+        # all clients of a kernel manager share its session identity and
+        # only the last one connected receives replies, so a client is only
+        # kept open while it is used
+        kc = self.km.client()
+        kc.start_channels()
+        try:
+            yield kc
+        finally:
+            kc.stop_channels()
+
+    def reset(self, path):
+        """
+        Delete all variables of the previous notebook and change to the
+        directory `path`. Returns False if the kernel did not reset.
+        """
+        if not self.km.is_alive():
+            return False
+        # relative to the directory of the conversion, not of the kernel
+        code = RESET_CODE.format(path=str(Path(path).resolve()))
+        with self.client() as kc:
+            msg_id = kc.execute(code, silent=True, store_history=False)
+            try:
+                while True:
+                    reply = kc.get_shell_msg(timeout=KERNEL_TIMEOUT)
+                    if reply["parent_header"].get("msg_id") == msg_id:
+                        return reply["content"]["status"] == "ok"
+            except Exception:
+                return False
+
+    def shutdown(self):
+        if self.km.has_kernel:
+            self.km.shutdown_kernel(now=True)
+        self.km.cleanup_resources()
+
+
+class KernelPool:
+    """
+    Kernels kept running to execute one notebook after the other, instead
+    of starting a kernel and importing the same libraries for every
+    notebook.
+
+    A kernel is started when none is idle and fewer than `size` run,
+    otherwise `acquire` waits for one to be released. Before each notebook,
+    the kernel deletes the variables of the previous one with `%reset -f`
+    and changes to the directory of the new notebook. Imported modules stay
+    loaded, including changes they made to classes, e.g. `_repr_png_`.
+    Kernels that crashed or fail to reset are replaced.
+    """
+
+    def __init__(self, kernel_name="python3", extra_arguments=(), size=1):
+        self.kernel_name = kernel_name
+        # same in-memory history as kernels started by nbclient
+        self.extra_arguments = list(extra_arguments) + [
+            "--HistoryManager.hist_file=:memory:"
+        ]
+        self.size = size
+        self._idle = []
+        self._running = 0
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def acquire(self, path):
+        """Yield the kernel manager of a kernel reset for a notebook in `path`."""
+        kernel = self._take()
+        try:
+            while not kernel.reset(path):
+                logger.info("Replacing a pooled kernel that did not reset")
+                kernel.shutdown()
+                kernel = PooledKernel(self.kernel_name, self.extra_arguments)
+        except BaseException:
+            self._release(kernel, broken=True)
+            raise
+        broken = True
+        try:
+            yield kernel.km
+            broken = False
+        finally:
+            self._release(kernel, broken)
+
+    def _take(self):
+        with self._condition:
+            while not self._idle and self._running >= self.size:
+                self._condition.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._running += 1
+        try:
+            return PooledKernel(self.kernel_name, self.extra_arguments)
+        except BaseException:
+            with self._condition:
+                self._running -= 1
+                self._condition.notify()
+            raise
+
+    def _release(self, kernel, broken=False):
+        # a kernel interrupted while executing may be in any state
+        if broken:
+            kernel.shutdown()
+        with self._condition:
+            if broken:
+                self._running -= 1
+            else:
+                self._idle.append(kernel)
+            self._condition.notify()
+
+    def shutdown(self):
+        """Shut down the idle kernels."""
+        with self._condition:
+            idle, self._idle = self._idle, []
+            self._running -= len(idle)
+        for kernel in idle:
+            kernel.shutdown()
+
+
+def get_kernel_pool(kernel_name, extra_arguments=(), size=1):
+    """
+    The pool of the kernels started with `kernel_name` and
+    `extra_arguments`, shared by all conversions of the process. A larger
+    `size` grows an existing pool.
+    """
+    key = (kernel_name, tuple(extra_arguments))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = KernelPool(kernel_name, extra_arguments, size)
+        pool.size = max(pool.size, size)
+    return pool
+
+
+@atexit.register
+def shutdown_kernel_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown()
@@ -0,0 +1,44 @@
+import atexit
+import importlib.util
+
+from dataframe_image.logger import logger
+
+
+def make_repr_png(center_df=True, max_rows=30, max_cols=10, chrome_path=None):
+    """
+    Create the _repr_png_ method that `convert(..., execute=True)` installs
+    on DataFrames and Stylers in the kernel executing the notebook.
+
+    With Playwright installed, all images are taken by one browser launched
+    on the first displayed DataFrame and closed when the kernel shuts down,
+    instead of launching Chrome for every output. Otherwise every image is
+    taken by a new Chrome process.
+
+    Parameters
+    ----------
+    center_df : bool, default True
+        Choose whether to center the DataFrames or not in the image.
+
+    max_rows : int, default 30
+        Maximum number of rows to output from DataFrame.
+
+    max_cols : int, default 10
+        Maximum number of columns to output from DataFrame.
+
+    chrome_path : str, default None
+        Path to your machine's chrome executable. When `None`, it is
+        automatically found.
+    """
+    if importlib.util.find_spec("playwright") is None:
+        from dataframe_image.converter.browser.chrome_converter import (
+            make_repr_png as make_chrome_repr_png,
+        )
+
+        logger.info("Playwright is not installed, launching Chrome for every image")
+        return make_chrome_repr_png(center_df, max_rows, max_cols, chrome_path)
+
+    from dataframe_image.converter.browser import PersistentPlayWrightConverter
+
+    ss = PersistentPlayWrightConverter(center_df, max_rows, max_cols, chrome_path)
+    atexit.register(ss.close)
+    return ss.repr_png_wrapper()
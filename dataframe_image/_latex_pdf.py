@@ -1,6 +1,7 @@
 import shutil
 
 from nbconvert.exporters import PDFExporter
+from traitlets import default
 
 from ._preprocessors import (
     ChangeOutputTypePreprocessor,
@@ -32,7 +33,6 @@ def get_latex_command():
 
 class DataFramePDFExporter(PDFExporter):
     export_from_notebook = "PDF - DataFrame as Image (via latex)"
-    latex_command = get_latex_command()
     # must give specific order of preprocessors
     # custom preprocessors are run after default_preprocessors
     preprocessors = [
@@ -48,3 +48,8 @@ class DataFramePDFExporter(PDFExporter):
         "nbconvert.preprocessors.ExtractOutputPreprocessor",
     ]
     default_preprocessors = []
+
+    @default("latex_command")
+    def _latex_command_default(self):
+        # searched when the exporter is used rather than when it is imported
+        return get_latex_command()
@@ -0,0 +1,131 @@
+import json
+import re
+
+import nbformat
+from nbformat import ValidationError
+
+# characters read from the notebook file at a time
+CHUNK_SIZE = 2**20
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class JSONStream:
+    """
+    Read JSON values one after the other from a file without loading all of
+    it. Values are decoded from a buffer of the next chunks of the file.
+    When a value does not fit, the buffer is doubled, so a value is decoded
+    a few times at most however many chunks it spans. Memory is bounded by
+    the largest value rather than by the file.
+    """
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.decoder = json.JSONDecoder()
+
+    def _read_more(self):
+        """Append to the unread part of the buffer as much as it holds."""
+        chunk = self.f.read(max(self.chunk_size, len(self.buf) - self.pos))
+        if not chunk:
+            return False
+        self.buf = self.buf[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """The next character that is not whitespace, or '' at the end."""
+        while True:
+            self.pos = WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._read_more():
+                return ""
+
+    def expect(self, chars):
+        """Consume the next character, which must be one of `chars`."""
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(
+                f"Expected one of {chars!r} in notebook JSON, got {char or 'the end'!r}"
+            )
+        self.pos += 1
+        return char
+
+    def decode(self):
+        """Decode and consume the value at the current position."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # the value may continue in the rest of the file
+                if not self._read_more():
+                    raise
+                continue
+            # so may a number at the end of the buffer
+            if end == len(self.buf) and self._read_more():
+                continue
+            self.pos = end
+            return value
+
+
+def read_cells(stream, limit=None):
+    cells = []
+    stream.expect("[")
+    if stream.peek() == "]":
+        stream.pos += 1
+        return cells
+    while True:
+        cell = stream.decode()
+        # cells past the limit are dropped at once
+        if limit is None or len(cells) < limit:
+            cells.append(cell)
+        if stream.expect(",]") == "]":
+            return cells
+
+
+def read_notebook(path, limit=None):
+    """
+    Read the notebook at `path` as `nbformat.read` does, but only keep the
+    first `limit` cells. The file is read in chunks and decoded cell by
+    cell, the cells past `limit` are dropped as soon as they are decoded, so
+    memory is proportional to the cells that are converted rather than to
+    the whole notebook.
+    Notebooks older than version 4 are read with `nbformat.read`.
+    """
+    nb_dict = {}
+    with open(path, encoding="utf-8") as f:
+        stream = JSONStream(f)
+        stream.expect("{")
+        if stream.peek() != "}":
+            while True:
+                key = stream.decode()
+                stream.expect(":")
+                if key == "cells":
+                    # a negative limit drops cells from the end, as a slice
+                    if limit is not None and limit < 0:
+                        nb_dict[key] = read_cells(stream)[:limit]
+                    else:
+                        nb_dict[key] = read_cells(stream, limit)
+                else:
+                    nb_dict[key] = stream.decode()
+                if stream.expect(",}") == "}":
+                    break
+
+    major, minor = nbformat.reader.get_version(nb_dict)
+    if major != 4:
+        with open(path, encoding="utf-8") as f:
+            nb = nbformat.read(f, as_version=4)
+        if limit is not None:
+            nb["cells"] = nb["cells"][:limit]
+        return nb
+
+    nb = nbformat.v4.to_notebook_json(nb_dict, minor=minor)
+    nb = nbformat.convert(nb, 4)
+    try:
+        nbformat.validate(nb)
+    except ValidationError as e:
+        nbformat.get_logger().error("Notebook JSON is invalid: %s", e)
+    return nb
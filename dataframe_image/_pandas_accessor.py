@@ -1,35 +1,50 @@
-import inspect
+import contextvars
+import functools
 import io
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from contextlib import contextmanager
 from pathlib import Path
 from typing import Literal
 
 import pandas as pd
 from pandas.io.formats.style import Styler
-from PIL import Image
-
-from dataframe_image.converter.browser import (
-    AsyncPlayWrightConverter,
-    ChromeConverter,
-    Html2ImageConverter,
-    PlayWrightConverter,
-    SeleniumConverter,
-)
+
+from dataframe_image._async import export_semaphore, to_thread
+from dataframe_image._timing import collect_stats, log_stats, phase
+from dataframe_image.converter import browser
 from dataframe_image.logger import logger
-from dataframe_image.pd_html import styler2html
+from dataframe_image.pd_html import PANDAS_1_4, styler2html
 
 MAX_COLS = 30
 MAX_ROWS = 100
 
 
+_max_image_pixels_lock = threading.Lock()
+# number of conversions running without the limit and the limit to restore
+_max_image_pixels_state = {"users": 0, "limit": None}
 
 
 @contextmanager
 def disable_max_image_pixels():
-    pre_limit = Image.MAX_IMAGE_PIXELS
-    Image.MAX_IMAGE_PIXELS = None
-    yield
-    Image.MAX_IMAGE_PIXELS = pre_limit
+    # conversions overlap in threads and event loop tasks, the limit is
+    # restored when the last of them ends
+    from PIL import Image
+
+    with _max_image_pixels_lock:
+        if _max_image_pixels_state["users"] == 0:
+            _max_image_pixels_state["limit"] = Image.MAX_IMAGE_PIXELS
+            Image.MAX_IMAGE_PIXELS = None
+        _max_image_pixels_state["users"] += 1
+    try:
+        yield
+    finally:
+        with _max_image_pixels_lock:
+            _max_image_pixels_state["users"] -= 1
+            if _max_image_pixels_state["users"] == 0:
+                Image.MAX_IMAGE_PIXELS = _max_image_pixels_state["limit"]
+
 
 @pd.api.extensions.register_dataframe_accessor("dfi")
 class _Export:
@@ -57,16 +72,47 @@ class _Export:
             dpi,
         )
 
+    def export_pages(
+        self,
+        filename,
+        rows_per_page=MAX_ROWS,
+        cols_per_page=MAX_COLS,
+        fontsize=14,
+        table_conversion="chrome",
+        chrome_path=None,
+        dpi=None,
+        max_workers=None,
+    ):
+        return export_pages(
+            self._df,
+            filename,
+            rows_per_page,
+            cols_per_page,
+            fontsize,
+            table_conversion,
+            chrome_path,
+            dpi,
+            max_workers=max_workers,
+        )
 
+
+# converter classes by name, their modules are only imported when used
 BROWSER_CONVERTER_DICT = {
-    "chrome": ChromeConverter,
-    "selenium": SeleniumConverter,
-    "html2image": Html2ImageConverter,
-    "playwright": PlayWrightConverter,
-    "playwright_async": AsyncPlayWrightConverter,
+    "chrome": "ChromeConverter",
+    "selenium": "SeleniumConverter",
+    "html2image": "Html2ImageConverter",
+    "playwright": "PlayWrightConverter",
+    "playwright_async": "AsyncPlayWrightConverter",
 }
 
 
+def vector_scales_message(extension):
+    return (
+        "Several dpi values can only be exported to images, "
+        f"{extension} files do not depend on the dpi"
+    )
+
+
 def prepare_converter(
     filename,
     fontsize=14,
@@ -79,9 +125,31 @@ def prepare_converter(
     dpi=None,
     use_mathjax=False,
     crop_top=True,
+    asynchronous=False,
+    scales=None,
 ):
+    """
+    Converter for `table_conversion`, a function of the html or table model
+    returning the image bytes. With `asynchronous`, a coroutine function
+    that does not block the event loop is returned instead. With `scales`,
+    ratios of `dpi`, it returns the list of the image bytes at each scale
+    from a single layout of the table. Browser converters print filenames
+    ending in .pdf or .svg as vectors instead of taking a screenshot.
+    """
+    # get extension from filename without dot
+    if isinstance(filename, io.IOBase):
+        extension = "png"
+    else:
+        extension = Path(filename).suffix
+
+    if extension.startswith("."):
+        extension = extension[1:]
+
     if table_conversion in BROWSER_CONVERTER_DICT:
-        converter = BROWSER_CONVERTER_DICT[table_conversion](
+        from .converter.browser.vector import VECTOR_FORMATS
+
+        converter_cls = getattr(browser, BROWSER_CONVERTER_DICT[table_conversion])
+        converter = converter_cls(
             max_rows=max_rows,
             max_cols=max_cols,
             chrome_path=chrome_path,
@@ -90,69 +158,89 @@ def prepare_converter(
             crop_top=crop_top,
             device_scale_factor=(1 if dpi is None else dpi / 100.0),
             use_mathjax=use_mathjax,
-        ).run
+        )
+        # pdf and svg are printed by the browser instead of screenshot
+        if extension.lower() in VECTOR_FORMATS:
+            if table_conversion == "html2image":
+                raise ValueError(
+                    "html2image can not export pdf or svg, use the chrome, "
+                    "playwright, selenium or matplotlib table_conversion"
+                )
+            if scales is not None:
+                raise ValueError(vector_scales_message(extension))
+            run = converter.run_vector_async if asynchronous else converter.run_vector
+            return functools.partial(run, format=extension.lower())
     else:
-        from .converter.matplotlib_table import MatplotlibTableConverter
+        from .converter.matplotlib_table import PIL_FORMATS, MatplotlibTableConverter
 
-        # get extension from filename without dot
-        if isinstance(filename, io.IOBase):
-            extension = "png"
-        else:
-            extension = Path(filename).suffix
+        # everything but raster formats is written by matplotlib as vectors
+        if scales is not None and extension.lower() not in PIL_FORMATS:
+            raise ValueError(vector_scales_message(extension))
 
-        if extension.startswith("."):
-            extension = extension[1:]
         converter = MatplotlibTableConverter(
             fontsize=fontsize,
             encode_base64=False,
             for_document=False,
             savefig_dpi=dpi,
             format=extension,
-        ).run
+        )
 
-    return converter
+    if scales is not None:
+        run = converter.run_scales_async if asynchronous else converter.run_scales
+        return functools.partial(run, scales=scales)
+    return converter.run_async if asynchronous else converter.run
 
 
-def generate_html(
-    obj: pd.DataFrame,
-    filename,
-    max_rows=None,
-    max_cols=None,
-):
+def split_dpi(filename, dpi):
+    """
+    The highest of several `dpi` values, the ratio of each one to it and the
+    file to write each one to, named after `filename` with its scale to
+    100 dpi, e.g. `df@2x.png` for 200. A single dpi is returned alone.
+    """
+    if not isinstance(dpi, (list, tuple)):
+        return dpi, None, None
+    if not dpi:
+        raise ValueError("dpi must contain at least one value")
+    if hasattr(filename, "write"):
+        raise ValueError(
+            "A file name is required to export several dpi values, "
+            "not a file-like object"
+        )
+    path = Path(filename)
+    filenames = [
+        path.with_name(f"{path.stem}@{value / 100:g}x{path.suffix}") for value in dpi
+    ]
+    max_dpi = max(dpi)
+    return max_dpi, [value / max_dpi for value in dpi], filenames
+
+
+def check_size(obj, max_rows=None, max_cols=None):
+    """
+    Raise for tables too large to export without explicit limits and return
+    `max_rows` and `max_cols` with -1 replaced by None.
+    """
     is_styler = isinstance(obj, Styler)
     df = obj.data if is_styler else obj
+    # older pandas cannot truncate Stylers, they are always fully rendered
+    styler_note = ""
+    if is_styler and not PANDAS_1_4:
+        styler_note = (
+            " Styled DataFrames require pandas 1.4 or later to select a subset "
+            "of rows or columns with `max_rows` and `max_cols`."
+        )
     if df.shape[0] > MAX_ROWS and max_rows is None:
-        error_msg = (
+        raise ValueError(
             f"Your DataFrame has more than {MAX_ROWS} rows and will produce a huge "
             "image file, possibly causing your computer to crash. Override this error "
-            "by explicitly setting `max_rows`. Use -1 for all rows."
+            "by explicitly setting `max_rows`. Use -1 for all rows." + styler_note
         )
-        if is_styler:
-            error_msg = (
-                f"Your Styled DataFrame has more than {MAX_ROWS} rows and will produce "
-                "a huge image file, possibly causing your computer to crash. Override "
-                "this error by explicitly setting `max_rows` to -1 for all columns. "
-                "Styled DataFrames are unable to select a subset of rows or columns "
-                "and therefore do not work with the `max_rows` and `max_cols` parameters"
-            )
-        raise ValueError(error_msg)
 
     if df.shape[1] > MAX_COLS and max_cols is None:
-        error_msg = (
+        raise ValueError(
             f"Your DataFrame has more than {MAX_COLS} columns and will produce a huge "
             "image file, possibly causing your computer to crash. Override this error "
-            "by explicitly setting `max_cols`. Use -1 for all columns."
+            "by explicitly setting `max_cols`. Use -1 for all columns." + styler_note
         )
-        if is_styler:
-            error_msg = (
-                f"Your Styled DataFrame has more than {MAX_COLS} columns and will "
-                "produce a huge image file, possibly causing your computer to crash. "
-                "Override this error by explicitly setting `max_cols` to -1 for "
-                "all columns. Styled DataFrames are unable to select a subset of "
-                "rows or columns and therefore do not work with the `max_rows` "
-                "and `max_cols` parameters"
-            )
-        raise ValueError(error_msg)
 
     if max_rows == -1:
         max_rows = None
@@ -160,8 +248,18 @@ def generate_html(
     if max_cols == -1:
         max_cols = None
 
-    if is_styler:
-        html = styler2html(obj)
+    return max_rows, max_cols
+
+
+def generate_html(
+    obj: pd.DataFrame,
+    filename,
+    max_rows=None,
+    max_cols=None,
+):
+    max_rows, max_cols = check_size(obj, max_rows, max_cols)
+    if isinstance(obj, Styler):
+        html = styler2html(obj, max_rows, max_cols)
     else:
         html = obj.to_html(max_rows=max_rows, max_cols=max_cols, notebook=True)
     # wrap html with a div and add id `dfi_table`
@@ -169,6 +267,32 @@ def generate_html(
     return html
 
 
+def generate_table(
+    obj: pd.DataFrame,
+    filename,
+    max_rows=None,
+    max_cols=None,
+):
+    """
+    Build the table model used by the matplotlib converter. DataFrames and
+    Stylers are read directly without generating html.
+    """
+    from .converter.table_model import TableModel
+
+    max_rows, max_cols = check_size(obj, max_rows, max_cols)
+    if isinstance(obj, Styler):
+        return TableModel.from_styler(obj, max_rows, max_cols)
+    return TableModel.from_frame(obj, max_rows=max_rows, max_cols=max_cols)
+
+
+def generate_input(obj, filename, max_rows, max_cols, table_conversion):
+    if table_conversion == "matplotlib":
+        with phase("generate_table"):
+            return generate_table(obj, filename, max_rows, max_cols)
+    with phase("generate_html"):
+        return generate_html(obj, filename, max_rows, max_cols)
+
+
 def save_image(img_str, filename):
 
     try:
@@ -204,27 +328,41 @@ def export(
         max_cols: int, optional, default None
         table_conversion: str, optional, default 'chrome'
         chrome_path: str, optional, default None
-        dpi: int, optional, default None
+        dpi: int or list of int, optional, default None
         use_mathjax: bool, optional, default False
         crop_top: bool, optional, crop top of the generate image, default True
+
+    Returns:
+        ExportStats: the time spent in each phase of the export and, when
+            resource accounting is enabled, the peak memory and bitmap sizes
     """
-    converter = prepare_converter(
-        filename,
-        fontsize,
-        max_rows,
-        max_cols,
-        table_conversion,
-        chrome_path,
-        dpi,
-        use_mathjax,
-        crop_top=crop_top,
-    )
-    html = generate_html(obj, filename, max_rows, max_cols)
+    dpi, scales, filenames = split_dpi(filename, dpi)
+    with collect_stats() as stats:
+        converter = prepare_converter(
+            filename,
+            fontsize,
+            max_rows,
+            max_cols,
+            table_conversion,
+            chrome_path,
+            dpi,
+            use_mathjax,
+            crop_top=crop_top,
+            scales=scales,
+        )
+        table = generate_input(obj, filename, max_rows, max_cols, table_conversion)
 
-    with disable_max_image_pixels():
-        img_str = converter(html)
+        with disable_max_image_pixels(), phase("convert"):
+            img_str = converter(table)
 
-    save_image(img_str, filename)
+        with phase("save_image"):
+            if scales is None:
+                save_image(img_str, filename)
+            else:
+                for img, name in zip(img_str, filenames):
+                    save_image(img, name)
+    log_stats(stats, "export")
+    return stats
 
 
 async def export_async(
@@ -251,9 +389,18 @@ async def export_async(
         max_cols: int, optional, default None
         table_conversion: str, optional, default 'chrome'
         chrome_path: str, optional, default None
-        dpi: int, optional, default None
+        dpi: int or list of int, optional, default None
         use_mathjax: bool, optional, default False
         crop_top: bool, optional, crop top of the generate image, default True
+
+    The event loop is never blocked: chrome and playwright run as async
+    subprocesses, the other converters, rendering the table and writing the
+    file run in threads. At most DFI_MAX_CONCURRENT_EXPORTS exports run at
+    the same time, by default the number of CPUs up to 4.
+
+    Returns:
+        ExportStats: the time spent in each phase of the export and, when
+            resource accounting is enabled, the peak memory and bitmap sizes
     """
     if table_conversion == "playwright_async":
         # show DeprecationWarning
@@ -266,26 +413,175 @@ async def export_async(
     async_converters = ["playwright"]
     if table_conversion in async_converters:
         table_conversion = f"{table_conversion}_async"
-    converter = prepare_converter(
-        filename,
-        fontsize,
-        max_rows,
-        max_cols,
-        table_conversion,
-        chrome_path,
-        dpi,
-        use_mathjax,
-        crop_top=crop_top,
-    )
-    html = generate_html(obj, filename, max_rows, max_cols)
-    with disable_max_image_pixels():
-        # check if converter is async
-        if inspect.iscoroutinefunction(converter):
-            img_str = await converter(html)
+    dpi, scales, filenames = split_dpi(filename, dpi)
+    async with export_semaphore():
+        with collect_stats() as stats:
+            converter = prepare_converter(
+                filename,
+                fontsize,
+                max_rows,
+                max_cols,
+                table_conversion,
+                chrome_path,
+                dpi,
+                use_mathjax,
+                crop_top=crop_top,
+                asynchronous=True,
+                scales=scales,
+            )
+            table = await to_thread(
+                generate_input, obj, filename, max_rows, max_cols, table_conversion
+            )
+            with disable_max_image_pixels(), phase("convert"):
+                img_str = await converter(table)
+            with phase("save_image"):
+                if scales is None:
+                    await to_thread(save_image, img_str, filename)
+                else:
+                    for img, name in zip(img_str, filenames):
+                        await to_thread(save_image, img, name)
+    log_stats(stats, "export")
+    return stats
+
+
+def split_columns(df, cols_per_page):
+    if cols_per_page is None or df.shape[1] <= cols_per_page:
+        yield df
+        return
+    for start in range(0, df.shape[1], cols_per_page):
+        yield df.iloc[:, start : start + cols_per_page]
+
+
+def iter_pages(chunks, rows_per_page, cols_per_page):
+    """
+    Yield the pages of an iterable of DataFrames, row by row. Rows are
+    collected across chunks until a page is full, so only one page worth of
+    rows is held besides the current chunk. When `rows_per_page` is None each
+    chunk is a page.
+    """
+    if rows_per_page is None:
+        for chunk in chunks:
+            yield from split_columns(chunk, cols_per_page)
+        return
+
+    buffered = []
+    num_buffered = 0
+    for chunk in chunks:
+        start = 0
+        while start < len(chunk):
+            stop = min(start + rows_per_page - num_buffered, len(chunk))
+            buffered.append(chunk.iloc[start:stop])
+            num_buffered += stop - start
+            start = stop
+            if num_buffered == rows_per_page:
+                page = pd.concat(buffered) if len(buffered) > 1 else buffered[0]
+                yield from split_columns(page, cols_per_page)
+                buffered = []
+                num_buffered = 0
+    if buffered:
+        page = pd.concat(buffered) if len(buffered) > 1 else buffered[0]
+        yield from split_columns(page, cols_per_page)
+
+
+def export_pages(
+    obj,
+    filename,
+    rows_per_page=MAX_ROWS,
+    cols_per_page=MAX_COLS,
+    fontsize=14,
+    table_conversion: Literal[
+        "chrome", "matplotlib", "html2image", "playwright", "selenium"
+    ] = "chrome",
+    chrome_path=None,
+    dpi=None,
+    use_mathjax=False,
+    crop_top=True,
+    max_workers=None,
+):
+    """export a large DataFrame as a numbered series of images
+
+    Args:
+        obj: DataFrame or iterable of DataFrames, e.g. from
+            `pd.read_csv(..., chunksize=...)`, required
+        filename: str containing `{page}`, required
+        rows_per_page: int, optional, default MAX_ROWS
+        cols_per_page: int, optional, default MAX_COLS
+        fontsize: int, optional, default 14
+        table_conversion: str, optional, default 'chrome'
+        chrome_path: str, optional, default None
+        dpi: int, optional, default None
+        use_mathjax: bool, optional, default False
+        crop_top: bool, optional, crop top of the generate image, default True
+        max_workers: int, optional, number of pages rendered at the same time,
+            default 1 for matplotlib and html2image and up to 4 for the other
+            browser converters
+
+    Returns:
+        list: the file names of the pages written
+    """
+    if isinstance(obj, Styler):
+        raise TypeError(
+            "Styled DataFrames cannot be split into pages. Export the pages of "
+            "the DataFrame or style each chunk and use `export` instead."
+        )
+    if "{page}" not in filename:
+        raise ValueError("`filename` must contain a `{page}` placeholder")
+
+    chunks = [obj] if isinstance(obj, pd.DataFrame) else obj
+    if max_workers is None:
+        # browsers render in their own processes, matplotlib holds the GIL and
+        # html2image writes every screenshot to the same file
+        if table_conversion in ("matplotlib", "html2image"):
+            max_workers = 1
         else:
-            img_str = converter(html)
-    # TODO: use async file writing
-    save_image(img_str, filename)
+            max_workers = min(4, os.cpu_count() or 1)
+    elif table_conversion == "html2image" and max_workers > 1:
+        raise ValueError(
+            "html2image writes every screenshot to the same file, "
+            "pages cannot be rendered at the same time, use max_workers=1"
+        )
+
+    # converters keep state between runs, each thread gets its own
+    local = threading.local()
+
+    def render_page(page, page_filename):
+        if not hasattr(local, "converter"):
+            local.converter = prepare_converter(
+                page_filename,
+                fontsize,
+                table_conversion=table_conversion,
+                chrome_path=chrome_path,
+                dpi=dpi,
+                use_mathjax=use_mathjax,
+                crop_top=crop_top,
+            )
+        table = generate_input(page, page_filename, -1, -1, table_conversion)
+        with disable_max_image_pixels(), phase("convert"):
+            img_str = local.converter(table)
+        with phase("save_image"):
+            save_image(img_str, page_filename)
+
+    filenames = []
+    with collect_stats() as stats, ThreadPoolExecutor(max_workers) as executor:
+        # only submit a few pages ahead of the ones being rendered
+        pending = set()
+        pages = iter_pages(chunks, rows_per_page, cols_per_page)
+        for number, page in enumerate(pages, 1):
+            page_filename = filename.replace("{page}", str(number))
+            # run in a copy of this context so the pages report to `stats`
+            context = contextvars.copy_context()
+            pending.add(
+                executor.submit(context.run, render_page, page, page_filename)
+            )
+            filenames.append(page_filename)
+            if len(pending) >= 2 * max_workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+        for future in pending:
+            future.result()
+    log_stats(stats, "export_pages")
+    return filenames
 
 
 setattr(Styler, "export_png", export)
@@ -345,9 +641,19 @@ dpi : int, default `None`
     If `table_conversion`=`chrome`, the dpi value is converted to a 
     "device scale factor" but should provide the same effect. When `None`,
     the "device scale factor" is 1.
+
+    A list of values, e.g. `[100, 200, 300]`, writes one image for each,
+    named after `filename` with its scale to 100 dpi: `df@1x.png`,
+    `df@2x.png` and `df@3x.png`. The table is laid out and captured once at
+    the highest value, the browsers downsample the capture for the others
+    and matplotlib draws the same figure at each dpi. `filename` must then
+    be a path.
 use_mathjax : bool, default False
     Use MathJax to render LaTeX in the DataFrame. This only works with 
     `table_conversion` set to 'playwright', 'matplotlib' or 'selenium'.
+    MathJax is only loaded when the DataFrame contains `$` or `\\(`, from
+    the local bundle set with the DFI_MATHJAX_PATH environment variable
+    when available.
 crop_top : bool, default True
     Crop the top of the generated image. This is useful when the DataFrame
     has a lot of white space at the top of the image. But if you can set it
@@ -369,3 +675,4 @@ obj : DataFrame or Styler object
 _Export.export.__doc__ = accessor_intro + doc_params
 export.__doc__ = export_intro + doc_params
 Styler.export_png.__doc__ = styler_intro + doc_params
+_Export.export_pages.__doc__ = export_pages.__doc__
@@ -0,0 +1,186 @@
+import json
+import re
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# pandas adds the full shape below truncated tables
+SHAPE_FOOTER = re.compile(r"<p>([\d,]+) rows × ([\d,]+) columns</p>")
+ROW_TAG = re.compile(r"<tr[\s>]")
+CELL_TAG = re.compile(r"<t[dh][\s>]")
+
+
+class ConversionProfile:
+    """
+    Time spent converting a notebook, per step, per cell and per table.
+
+    Steps are the stages of `Converter.convert`, such as `execute_notebook`
+    or `to_md`. Cell times are split by step, execution times are taken from
+    the timestamps the kernel records in the cell metadata. Every call of
+    the table converter is recorded with the cell it belongs to and the shape
+    of the table.
+
+    Attributes:
+        steps (dict): total seconds spent in each step
+        cells (dict): cell index -> {step: seconds}
+        tables (list): one dict with cell, shape and seconds per table
+        stats (ExportStats): phases of the table converter, e.g. `screenshot`,
+            and the peak memory and bitmap sizes of the conversion
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.steps = {}
+        self.cells = {}
+        self.tables = []
+        self.stats = None
+        self.current_cell = None
+        self.current_step = None
+
+    @contextmanager
+    def step(self, name):
+        """Time the block as step `name`."""
+        self.current_step = name
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.steps[name] = self.steps.get(name, 0) + seconds
+            self.current_step = None
+
+    def add_cell(self, index, step, seconds):
+        cell = self.cells.setdefault(index, {})
+        cell[step] = cell.get(step, 0) + seconds
+
+    def preprocess(self, preprocessor, nb, resources):
+        """
+        Run `preprocessor` cell by cell, as `Preprocessor.preprocess` does,
+        timing each cell under the current step.
+        """
+        for index, cell in enumerate(nb.cells):
+            self.current_cell = index
+            start = time.perf_counter()
+            try:
+                nb.cells[index], resources = preprocessor.preprocess_cell(
+                    cell, resources, index
+                )
+            finally:
+                self.add_cell(index, self.current_step, time.perf_counter() - start)
+                self.current_cell = None
+        return nb, resources
+
+    def add_execution_times(self, nb):
+        """Read the execution time of each cell from its metadata."""
+        for index, cell in enumerate(nb.cells):
+            execution = cell.get("metadata", {}).get("execution", {})
+            start = execution.get("iopub.status.busy")
+            end = execution.get("iopub.status.idle")
+            if start and end:
+                seconds = (parse_timestamp(end) - parse_timestamp(start)).total_seconds()
+                self.add_cell(index, "execute_notebook", seconds)
+
+    def wrap_converter(self, converter):
+        """Return `converter` recording the time and shape of every table."""
+
+        def timed_converter(html):
+            start = time.perf_counter()
+            try:
+                return converter(html)
+            finally:
+                self.tables.append(
+                    {
+                        "cell": self.current_cell,
+                        "step": self.current_step,
+                        "shape": table_shape(html),
+                        "seconds": time.perf_counter() - start,
+                    }
+                )
+
+        return timed_converter
+
+    def slowest_cells(self, top=None):
+        cells = sorted(
+            self.cells.items(), key=lambda item: sum(item[1].values()), reverse=True
+        )
+        return cells[:top]
+
+    def slowest_tables(self, top=None):
+        return sorted(self.tables, key=lambda t: t["seconds"], reverse=True)[:top]
+
+    def to_dict(self, top=10):
+        return {
+            "notebook": self.name,
+            "steps": self.steps,
+            "phases": dict(self.stats.timings) if self.stats else {},
+            "resources": dict(self.stats.resources) if self.stats else {},
+            "cells": [
+                {"cell": index, "seconds": sum(steps.values()), "steps": steps}
+                for index, steps in sorted(self.cells.items())
+            ],
+            "tables": self.tables,
+            "slowest_tables": self.slowest_tables(top),
+        }
+
+    def report(self, top=10):
+        """Text report of the steps and of the `top` slowest cells and tables."""
+        lines = [f"Conversion profile of {self.name}", "", "Steps:"]
+        for name, seconds in self.steps.items():
+            lines.append(f"  {name:<32}{seconds:>9.3f}s")
+        if self.stats and self.stats.timings:
+            lines += ["", "Table converter phases:"]
+            for name, seconds in self.stats.timings.items():
+                count = self.stats.counts[name]
+                lines.append(f"  {name:<32}{seconds:>9.3f}s  (x{count})")
+        if self.stats and self.stats.resources:
+            lines += ["", "Peak resources:"]
+            for name, nbytes in self.stats.resources.items():
+                lines.append(f"  {name:<32}{nbytes / 2**20:>9.1f}MB")
+        if self.cells:
+            lines += ["", f"Slowest cells (top {top}):"]
+            for index, steps in self.slowest_cells(top):
+                detail = ", ".join(f"{name} {s:.3f}s" for name, s in steps.items())
+                total = sum(steps.values())
+                lines.append(f"  cell {index:<27}{total:>9.3f}s  ({detail})")
+        if self.tables:
+            total = sum(t["seconds"] for t in self.tables)
+            lines += [
+                "",
+                f"Tables: {len(self.tables)} rendered in {total:.3f}s",
+                f"Slowest tables (top {top}):",
+            ]
+            for table in self.slowest_tables(top):
+                rows, cols = table["shape"]
+                lines.append(
+                    f"  cell {table['cell']!s:<6}{rows:>6} x {cols:<13}"
+                    f"{table['seconds']:>9.3f}s  ({table['step']})"
+                )
+        return "\n".join(lines)
+
+    def write(self, output=None, top=10):
+        """Print the report to stderr and write it as JSON to `output`."""
+        print(self.report(top), file=sys.stderr)
+        if output:
+            with open(output, "w", encoding="utf-8") as f:
+                json.dump(self.to_dict(top), f, indent=2)
+
+
+def parse_timestamp(value):
+    # Python < 3.11 does not accept the Z suffix
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def table_shape(html):
+    """
+    Shape of the table in `html`. The footer pandas adds to truncated tables
+    is used when present, otherwise the rows and cells of the last row of
+    the displayed table are counted.
+    """
+    match = SHAPE_FOOTER.search(html)
+    if match:
+        return tuple(int(n.replace(",", "")) for n in match.groups())
+    rows = ROW_TAG.split(html)
+    if len(rows) < 2:
+        return (0, 0)
+    return (len(rows) - 1, len(CELL_TAG.findall(rows[-1])))
@@ -0,0 +1,215 @@
+import contextvars
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+from .logger import logger
+
+_current_stats = contextvars.ContextVar("dataframe_image_stats", default=None)
+
+
+class ExportStats:
+    """
+    Timings of the phases of one or more exports.
+
+    Phases are named steps such as `generate_html`, `screenshot` or
+    `save_image`. A phase that runs several times, e.g. a screenshot that is
+    retried with a larger window, is summed and counted. Phases may be nested
+    in others, `convert` for example includes `screenshot` and `crop`.
+
+    With resource accounting enabled, the peak number of bytes of each
+    resource is recorded as well: `python_peak` allocated by Python,
+    `child_rss_peak` resident in child processes such as the browser,
+    `temp_files` written to disk and the bitmaps of each stage, e.g.
+    `bitmap_screenshot`.
+
+    Attributes:
+        timings (dict): total seconds spent in each phase
+        counts (dict): number of times each phase ran
+        resources (dict): peak bytes of each resource
+    """
+
+    def __init__(self, track_resources=False):
+        self.timings = {}
+        self.counts = {}
+        self.resources = {}
+        self.track_resources = track_resources
+        self._lock = threading.Lock()
+
+    def add(self, phase, seconds, count=1):
+        with self._lock:
+            self.timings[phase] = self.timings.get(phase, 0) + seconds
+            self.counts[phase] = self.counts.get(phase, 0) + count
+
+    def peak(self, resource, nbytes):
+        with self._lock:
+            self.resources[resource] = max(self.resources.get(resource, 0), nbytes)
+
+    def merge(self, other):
+        for phase, seconds in other.timings.items():
+            self.add(phase, seconds, other.counts[phase])
+        for resource, nbytes in other.resources.items():
+            self.peak(resource, nbytes)
+
+    def __repr__(self):
+        parts = []
+        for phase, seconds in self.timings.items():
+            part = f"{phase}={seconds:.3f}s"
+            if self.counts[phase] > 1:
+                part += f" (x{self.counts[phase]})"
+            parts.append(part)
+        for resource, nbytes in self.resources.items():
+            parts.append(f"{resource}={nbytes / 2**20:.1f}MB")
+        return f"ExportStats({', '.join(parts)})"
+
+
+class ResourceMonitor:
+    """
+    Measure the peak memory of Python and of all child processes while it
+    runs. Python allocations are traced with tracemalloc. The resident set
+    size of the process tree below this process, e.g. Chrome and its
+    renderers, is polled from /proc, which is only available on Linux.
+    """
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.child_rss_peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._poll, daemon=True)
+        self._started_tracing = False
+
+    def start(self):
+        if tracemalloc.is_tracing():
+            # python < 3.9 has no reset_peak, the peak then covers the
+            # whole time tracing has been on
+            if hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+        else:
+            tracemalloc.start()
+            self._started_tracing = True
+        if Path("/proc/self/stat").exists():
+            self._thread.start()
+
+    def stop(self, stats):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        stats.peak("python_peak", tracemalloc.get_traced_memory()[1])
+        if self._started_tracing:
+            tracemalloc.stop()
+        if self.child_rss_peak:
+            stats.peak("child_rss_peak", self.child_rss_peak)
+
+    def _poll(self):
+        while True:
+            self.child_rss_peak = max(self.child_rss_peak, child_rss())
+            if self._stop.wait(self.interval):
+                break
+
+
+def child_rss(pid=None):
+    """Total resident set size in bytes of all descendants of process `pid`."""
+    pid = os.getpid() if pid is None else pid
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    children = {}
+    rss = {}
+    for stat_file in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            stat = stat_file.read_text()
+        except OSError:
+            # the process exited in the meantime
+            continue
+        # the command name in parentheses may contain spaces
+        fields = stat.rpartition(")")[2].split()
+        proc_pid = int(stat_file.parent.name)
+        children.setdefault(int(fields[1]), []).append(proc_pid)
+        rss[proc_pid] = int(fields[21]) * page_size
+    total = 0
+    stack = list(children.get(pid, []))
+    while stack:
+        proc_pid = stack.pop()
+        total += rss[proc_pid]
+        stack.extend(children.get(proc_pid, []))
+    return total
+
+
+@contextmanager
+def collect_stats(resources=None):
+    """
+    Collect the phase timings of everything run inside the block into a new
+    `ExportStats`. When collectors are nested, the outer one also receives
+    the timings of the inner one.
+
+    `resources=True` also records the peak memory of Python and of child
+    processes, bitmap sizes and temp file bytes, see `ExportStats`. By
+    default resources are accounted when the outer collector accounts them
+    or when the environment variable DFI_RESOURCES is set to 1.
+
+    >>> with collect_stats(resources=True) as stats:
+    ...     dfi.export(df, "df.png")
+    >>> stats.timings, stats.resources
+    """
+    outer = _current_stats.get()
+    outer_tracks = outer is not None and outer.track_resources
+    if resources is None:
+        resources = outer_tracks or os.environ.get("DFI_RESOURCES") == "1"
+    stats = ExportStats(track_resources=resources)
+    # the outermost accounting collector measures memory for all nested ones
+    monitor = ResourceMonitor() if resources and not outer_tracks else None
+    if monitor is not None:
+        monitor.start()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+        if monitor is not None:
+            monitor.stop(stats)
+        if outer is not None:
+            outer.merge(stats)
+
+
+@contextmanager
+def phase(name):
+    """Time the block as phase `name` of the current collector, if any."""
+    stats = _current_stats.get()
+    if stats is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.add(name, time.perf_counter() - start)
+
+
+def record_size(resource, nbytes):
+    """Record `nbytes` of `resource` if the current collector accounts resources."""
+    stats = _current_stats.get()
+    if stats is not None and stats.track_resources:
+        stats.peak(resource, nbytes)
+
+
+def record_bitmap(stage, img):
+    """Record the uncompressed size of the PIL image produced by `stage`."""
+    record_size(f"bitmap_{stage}", img.width * img.height * len(img.getbands()))
+
+
+def record_temp_files(directory):
+    """Record the bytes of the files in the temporary `directory`."""
+    stats = _current_stats.get()
+    if stats is not None and stats.track_resources:
+        nbytes = sum(f.stat().st_size for f in Path(directory).rglob("*") if f.is_file())
+        stats.peak("temp_files", nbytes)
+
+
+def log_stats(stats, label):
+    """
+    Log the timings when the DFI_TIMINGS environment variable is set to 1
+    and the resources when they are accounted.
+    """
+    if os.environ.get("DFI_TIMINGS") == "1" or stats.resources:
+        logger.info("%s timings: %s", label, stats)
@@ -1 +1,10 @@
-from .browser import *  # noqa: F403
+from .browser import __all__
+
+
+def __getattr__(name):
+    # browser converters are loaded lazily, see converter.browser
+    if name in __all__:
+        from . import browser
+
+        return getattr(browser, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
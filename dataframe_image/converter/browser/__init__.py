@@ -1,12 +1,27 @@
-from .chrome_converter import ChromeConverter
-from .html2image_converter import Html2ImageConverter
-from .playwright_converter import AsyncPlayWrightConverter, PlayWrightConverter
-from .selenium_converter import SeleniumConverter
+import importlib
+
+# converter name -> module defining it, modules are imported on first access
+_CONVERTER_MODULES = {
+    "ChromeConverter": "chrome_converter",
+    "Html2ImageConverter": "html2image_converter",
+    "PlayWrightConverter": "playwright_converter",
+    "AsyncPlayWrightConverter": "playwright_converter",
+    "PersistentPlayWrightConverter": "playwright_converter",
+    "SeleniumConverter": "selenium_converter",
+}
 
 __all__ = [
     "ChromeConverter",
     "Html2ImageConverter",
     "PlayWrightConverter",
     "AsyncPlayWrightConverter",
+    "PersistentPlayWrightConverter",
     "SeleniumConverter",
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    if name in _CONVERTER_MODULES:
+        module = importlib.import_module(f".{_CONVERTER_MODULES[name]}", __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
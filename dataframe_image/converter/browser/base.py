@@ -7,8 +7,13 @@ from pathlib import Path
 import numpy as np
 from PIL import Image, ImageOps
 
+from dataframe_image._async import to_thread
+from dataframe_image._timing import phase, record_bitmap, record_size
 from dataframe_image.pd_html import styler2html
 
+from .mathjax import FORMULA_CACHE, get_mathjax_script, has_math
+from .vector import PRINT_PAGE, pdf_to_svg
+
 _logger = logging.getLogger(__name__)
 
 
@@ -62,7 +67,7 @@ class BrowserConverter(ABC):
             str: The valid HTML string.
         """
         # <style>...</style> must be in the head
-        css_str = self.get_css()
+        css_str = self.get_css(html)
         # <div>...</div> must be in the body
         table_div = html
 
@@ -80,9 +85,36 @@ class BrowserConverter(ABC):
         """
         return page
 
-    def get_css(self) -> str:
+    def build_print_html(self, html: str) -> str:
+        """
+        Build the page HTML to print, with a page fitted to the table.
+
+        Args:
+            html (str): The HTML to build.
+
+        Returns:
+            str: The valid HTML string.
+        """
+        return self.build_valid_html(html).replace("</body>", PRINT_PAGE + "</body>")
+
+    def needs_mathjax(self, html: str) -> bool:
         """
-        Get the CSS for the HTML.
+        Check if MathJax is enabled and the HTML contains math.
+
+        Args:
+            html (str): The HTML to render.
+
+        Returns:
+            bool: Whether MathJax must be loaded.
+        """
+        return self.use_mathjax and has_math(html)
+
+    def get_css(self, html: str = "") -> str:
+        """
+        Get the CSS for the HTML, and the MathJax scripts if it contains math.
+
+        Args:
+            html (str): The HTML to render. Default is "".
 
         Returns:
             str: The CSS string.
@@ -93,25 +125,41 @@ class BrowserConverter(ABC):
             css = "<style>" + f.read() + "</style>"
         justify = "center" if self.center_df else "left"
         css = css.format(fontsize=self.fontsize, justify=justify)
-        if self.use_mathjax:
-            script = """<script>
-            MathJax = {
-            tex: {
-                inlineMath: [['$', '$'], ['\\(', '\\)']]
-            },
-            svg: {
-                fontCache: 'global'
-            }
-            };
-            </script>
-            <script type="text/javascript" id="MathJax-script" async
-            src="https://cdn.jsdelivr.net/npm/mathjax@3/es5/tex-svg.js">
-            </script>
-            <script src="https://polyfill.io/v3/polyfill.min.js?features=es6"></script> 
-            <script id="MathJax-script" async src="https://cdn.jsdelivr.net/npm/mathjax@3/es5/tex-mml-chtml.js"></script>"""
-            css += script
+        if self.needs_mathjax(html):
+            css += get_mathjax_script()
         return css
 
+    def prerender_formulas(self, html: str) -> str:
+        """
+        Replace the formulas of the HTML by their svg from the formula cache,
+        typesetting the ones not cached yet with `typeset_formulas`. The page
+        then needs no MathJax unless some formulas could not be typeset.
+
+        Args:
+            html (str): The HTML to render.
+
+        Returns:
+            str: The HTML with svg formulas.
+        """
+        missing = FORMULA_CACHE.missing(html)
+        svgs = self.typeset_formulas(missing) if missing else {}
+        FORMULA_CACHE.update(svgs)
+        return FORMULA_CACHE.inline(html, svgs)
+
+    def typeset_formulas(self, formulas: list) -> dict:
+        """
+        Typeset formulas to svg. Converters without a way to run MathJax
+        outside of the page return nothing and leave the formulas to be
+        typeset in the page.
+
+        Args:
+            formulas (list): TeX source of the formulas.
+
+        Returns:
+            dict: The svg of each formula.
+        """
+        return {}
+
     def should_enlarge(self, img: Image, ss_width: int, ss_height: int) -> tuple:
         """
         Check if the image should be enlarged.
@@ -185,6 +233,61 @@ class BrowserConverter(ABC):
 
         return im
 
+    def render(self, html: str) -> Image:
+        """
+        Take the screenshot of the HTML and crop it.
+
+        Args:
+            html (str): The HTML to convert.
+
+        Returns:
+            Image: The cropped image, at the device scale factor.
+        """
+        if self.use_mathjax:
+            with phase("formulas"):
+                html = self.prerender_formulas(html)
+        with phase("screenshot"):
+            im = self.screenshot(html)
+        record_bitmap("screenshot", im)
+        with phase("crop"):
+            temp_img = self.crop(im)
+        record_bitmap("crop", temp_img)
+        return temp_img
+
+    def downscale(self, img: Image, scale: float) -> Image:
+        """
+        Resample the image to `scale` times its size.
+
+        Args:
+            img (Image): The image to resample.
+            scale (float): The ratio of the new size, at most 1.
+
+        Returns:
+            Image: The resampled image.
+        """
+        if scale == 1:
+            return img
+        size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+        # Lanczos keeps lines and text sharp when reducing several times
+        return img.resize(size, Image.LANCZOS)
+
+    def encode(self, img: Image, scale: float = 1) -> bytes:
+        """
+        Downscale the image to `scale` and finalize it.
+
+        Args:
+            img (Image): The cropped image.
+            scale (float): The ratio of the image size to keep. Default is 1.
+
+        Returns:
+            bytes: The finalized image bytes.
+        """
+        if scale != 1:
+            with phase("downscale"):
+                img = self.downscale(img, scale)
+        with phase("finalize_image"):
+            return self.finalize_image(img)
+
     def run(self, html: str) -> bytes:
         """
         Run the converter on the HTML.
@@ -195,10 +298,175 @@ class BrowserConverter(ABC):
         Returns:
             bytes: The converted image bytes.
         """
-        im = self.screenshot(html)
-        temp_img = self.crop(im)
-        image_bytes = self.finalize_image(temp_img)
-        return image_bytes
+        return self.encode(self.render(html))
+
+    def run_scales(self, html: str, scales: list) -> list:
+        """
+        Run the converter on the HTML once and return the image at each of
+        `scales`. The page is laid out and captured at the device scale
+        factor, the smaller images are downsampled from that capture.
+
+        Args:
+            html (str): The HTML to convert.
+            scales (list): Ratios of the device scale factor, at most 1.
+
+        Returns:
+            list: The converted image bytes, in the order of `scales`.
+        """
+        img = self.render(html)
+        return [self.encode(img, scale) for scale in scales]
+
+    async def screenshot_async(self, html: str) -> Image:
+        """
+        Take a screenshot of the HTML without blocking the event loop.
+        Converters without an async browser API take it in a thread.
+
+        Args:
+            html (str): The HTML to screenshot.
+
+        Returns:
+            Image: The screenshot image.
+        """
+        return await to_thread(self.screenshot, html)
+
+    async def render_async(self, html: str) -> Image:
+        """
+        Take the screenshot of the HTML and crop it like `render`, the
+        screenshot is awaited and formulas and cropping run in a thread.
+
+        Args:
+            html (str): The HTML to convert.
+
+        Returns:
+            Image: The cropped image, at the device scale factor.
+        """
+        if self.use_mathjax:
+            with phase("formulas"):
+                html = await to_thread(self.prerender_formulas, html)
+        with phase("screenshot"):
+            im = await self.screenshot_async(html)
+        record_bitmap("screenshot", im)
+        with phase("crop"):
+            temp_img = await to_thread(self.crop, im)
+        record_bitmap("crop", temp_img)
+        return temp_img
+
+    async def run_async(self, html: str) -> bytes:
+        """
+        Run the converter on the HTML like `run` without blocking the event
+        loop.
+
+        Args:
+            html (str): The HTML to convert.
+
+        Returns:
+            bytes: The converted image bytes.
+        """
+        img = await self.render_async(html)
+        return await to_thread(self.encode, img)
+
+    async def run_scales_async(self, html: str, scales: list) -> list:
+        """
+        Run the converter on the HTML once like `run_scales` without
+        blocking the event loop.
+
+        Args:
+            html (str): The HTML to convert.
+            scales (list): Ratios of the device scale factor, at most 1.
+
+        Returns:
+            list: The converted image bytes, in the order of `scales`.
+        """
+        img = await self.render_async(html)
+        return [await to_thread(self.encode, img, scale) for scale in scales]
+
+    def print_pdf(self, html: str) -> bytes:
+        """
+        Print the HTML to a one page PDF fitted to the table.
+
+        Args:
+            html (str): The HTML to print.
+
+        Returns:
+            bytes: The PDF bytes.
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} can not export pdf or svg, use the chrome, "
+            "playwright, selenium or matplotlib table_conversion"
+        )
+
+    async def print_pdf_async(self, html: str) -> bytes:
+        """
+        Print the HTML to PDF without blocking the event loop. Converters
+        without an async browser API print it in a thread.
+
+        Args:
+            html (str): The HTML to print.
+
+        Returns:
+            bytes: The PDF bytes.
+        """
+        return await to_thread(self.print_pdf, html)
+
+    def finalize_vector(self, pdf: bytes, format: str) -> bytes:
+        """
+        Convert the printed PDF to `format`, pdf or svg.
+
+        Args:
+            pdf (bytes): The printed PDF.
+            format (str): The format of the file, pdf or svg.
+
+        Returns:
+            bytes: The finalized file bytes.
+        """
+        data = pdf
+        if format == "svg":
+            with phase("pdf_to_svg"):
+                data = pdf_to_svg(pdf)
+        if self.encode_base64:
+            data = base64.b64encode(data).decode()
+        return data
+
+    def run_vector(self, html: str, format: str = "pdf") -> bytes:
+        """
+        Run the converter on the HTML through the print path of the browser.
+        The table is laid out once and printed as vectors, so there is no
+        screenshot to enlarge, crop or stitch.
+
+        Args:
+            html (str): The HTML to convert.
+            format (str): The format of the file, pdf or svg. Default is pdf.
+
+        Returns:
+            bytes: The converted file bytes.
+        """
+        if self.use_mathjax:
+            with phase("formulas"):
+                html = self.prerender_formulas(html)
+        with phase("print_pdf"):
+            pdf = self.print_pdf(html)
+        record_size("pdf", len(pdf))
+        return self.finalize_vector(pdf, format)
+
+    async def run_vector_async(self, html: str, format: str = "pdf") -> bytes:
+        """
+        Run the converter on the HTML like `run_vector` without blocking the
+        event loop.
+
+        Args:
+            html (str): The HTML to convert.
+            format (str): The format of the file, pdf or svg. Default is pdf.
+
+        Returns:
+            bytes: The converted file bytes.
+        """
+        if self.use_mathjax:
+            with phase("formulas"):
+                html = await to_thread(self.prerender_formulas, html)
+        with phase("print_pdf"):
+            pdf = await self.print_pdf_async(html)
+        record_size("pdf", len(pdf))
+        return await to_thread(self.finalize_vector, pdf, format)
 
     def finalize_image(self, img: Image) -> bytes:
         """
@@ -224,7 +492,7 @@ class BrowserConverter(ABC):
 
         def _repr_png_(self):
             if isinstance(self, Styler):
-                html = styler2html(self)
+                html = styler2html(self, ss.max_rows, ss.max_cols)
             else:
                 html = self.to_html(
                     max_rows=ss.max_rows, max_cols=ss.max_cols, notebook=True
@@ -1,16 +1,27 @@
+import asyncio
 import io
+import json
 import os
 import platform
+import re
 import shutil
 import subprocess
+from html import unescape
 from pathlib import Path
 from tempfile import TemporaryDirectory
 
 from PIL import Image
 
+from dataframe_image._async import to_thread
+from dataframe_image._timing import phase, record_temp_files
 from dataframe_image.converter.browser.base import BrowserConverter
+from dataframe_image.converter.browser.mathjax import get_typeset_page
 from dataframe_image.logger import logger
 
+# milliseconds of virtual time chrome gives MathJax to load and typeset
+TYPESET_TIME_BUDGET = 10000
+TYPESET_OUTPUT = re.compile(r'<pre id="dfi_svgs">(.*?)</pre>', re.S)
+
 
 def get_system():
     system = platform.system().lower()
@@ -104,60 +115,186 @@ class ChromeConverter(BrowserConverter):
         )
         self.chrome_path = get_chrome_path(chrome_path)
 
-    def screenshot(self, html, ss_width=1400, ss_height=900) -> Image:
-        html_css = self.get_css() + html
+    def get_args(self, temp_dir):
+        args = [
+            "--enable-logging",
+            "--disable-gpu",
+            "--headless",
+            # "--no-sandbox",
+            f"--crash-dumps-dir={temp_dir}",
+            f"--force-device-scale-factor={self.device_scale_factor}",
+        ]
+        # root user needs no-sandbox
+        if (
+            os.environ.get("NO_SANDBOX", False)
+            or platform.system().lower() != "windows"
+            and os.geteuid() == 0
+        ):
+            args.append("--no-sandbox")
+        return args
+
+    def temp_dir(self):
         # create temp dir under current user home dir
         # snap version Chrome only allow to access files under home dir
         dfi_cache_dir = Path.home() / ".dataframe_image"
         dfi_cache_dir.mkdir(exist_ok=True)
-        with TemporaryDirectory(dir=dfi_cache_dir) as temp_dir:
-            temp_html = Path(temp_dir) / "temp.html"
-            temp_img = Path(temp_dir) / "temp.png"
+        return TemporaryDirectory(dir=dfi_cache_dir)
+
+    def run_chrome(self, args):
+        return subprocess.run(
+            executable=self.chrome_path,
+            args=args,
+            capture_output=True,
+            check=True,
+        )
+
+    async def run_chrome_async(self, args):
+        """Same as `run_chrome` in a subprocess that does not block the event loop."""
+        # args[0] is only the program name, as with `run_chrome`
+        process = await asyncio.create_subprocess_exec(
+            *args,
+            executable=self.chrome_path,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        stdout, stderr = await process.communicate()
+        if process.returncode:
+            raise subprocess.CalledProcessError(
+                process.returncode, args, stdout, stderr
+            )
+        return subprocess.CompletedProcess(args, process.returncode, stdout, stderr)
+
+    def typeset_formulas(self, formulas):
+        # chrome has no scripting interface on the command line, the page
+        # typesets the formulas itself and the svgs are read from its dom
+        with self.temp_dir() as temp_dir:
+            temp_html = Path(temp_dir) / "formulas.html"
             with open(temp_html, "w", encoding="utf-8") as f:
-                f.write(html_css)
-
-            args = [
-                "--enable-logging",
-                "--disable-gpu",
-                "--headless",
-                # "--no-sandbox",
-                f"--crash-dumps-dir={temp_dir}",
-                f"--force-device-scale-factor={self.device_scale_factor}",
-            ]
-            # root user needs no-sandbox
-            if (
-                os.environ.get("NO_SANDBOX", False)
-                or platform.system().lower() != "windows"
-                and os.geteuid() == 0
-            ):
-                args.append("--no-sandbox")
-
-            if ss_width and ss_height:
-                args.append(f"--window-size={ss_width},{ss_height}")
-
-            args += [
-                "--hide-scrollbars",
-                f"--screenshot={str(temp_img)}",
+                f.write(get_typeset_page(formulas))
+            args = self.get_args(temp_dir) + [
+                "--dump-dom",
+                f"--virtual-time-budget={TYPESET_TIME_BUDGET}",
                 str(temp_html),
             ]
+            with phase("browser"):
+                result = self.run_chrome(args)
+        match = TYPESET_OUTPUT.search(result.stdout.decode("utf-8"))
+        if match is None or not match.group(1):
+            return {}
+        svgs = json.loads(unescape(match.group(1)))
+        return dict(zip(formulas, svgs))
 
-            subprocess.run(
-                executable=self.chrome_path, args=args, capture_output=True, check=True
-            )
-            with open(temp_img, "rb") as f:
-                bio = io.BytesIO(f.read())
-            im = Image.open(bio)
+    def prepare_screenshot(self, temp_dir, html, ss_width, ss_height):
+        """
+        Write the page into `temp_dir` and return the arguments making
+        chrome save its screenshot, and the path of the screenshot.
+        """
+        html_css = self.get_css(html) + html
+        temp_html = Path(temp_dir) / "temp.html"
+        temp_img = Path(temp_dir) / "temp.png"
+        with open(temp_html, "w", encoding="utf-8") as f:
+            f.write(html_css)
+
+        args = self.get_args(temp_dir)
+        if ss_width and ss_height:
+            args.append(f"--window-size={ss_width},{ss_height}")
+
+        args += [
+            "--hide-scrollbars",
+            f"--screenshot={str(temp_img)}",
+            str(temp_html),
+        ]
+        return args, temp_img
+
+    def prepare_print(self, temp_dir, html):
+        """
+        Write the page to print into `temp_dir` and return the arguments
+        making chrome print it to PDF, and the path of the PDF.
+        """
+        temp_html = Path(temp_dir) / "temp.html"
+        temp_pdf = Path(temp_dir) / "temp.pdf"
+        with open(temp_html, "w", encoding="utf-8") as f:
+            f.write(self.build_print_html(html))
+        # the page size is set by the @page rule of the page
+        args = self.get_args(temp_dir) + [
+            "--no-pdf-header-footer",
+            # the same before chrome 111
+            "--print-to-pdf-no-header",
+            f"--print-to-pdf={temp_pdf}",
+            str(temp_html),
+        ]
+        return args, temp_pdf
+
+    def read_pdf(self, temp_dir, temp_pdf):
+        record_temp_files(temp_dir)
+        with open(temp_pdf, "rb") as f:
+            return f.read()
+
+    def print_pdf(self, html):
+        with self.temp_dir() as temp_dir:
+            args, temp_pdf = self.prepare_print(temp_dir, html)
+            with phase("browser"):
+                self.run_chrome(args)
+            return self.read_pdf(temp_dir, temp_pdf)
+
+    async def print_pdf_async(self, html):
+        with self.temp_dir() as temp_dir:
+            args, temp_pdf = await to_thread(self.prepare_print, temp_dir, html)
+            with phase("browser"):
+                await self.run_chrome_async(args)
+            return await to_thread(self.read_pdf, temp_dir, temp_pdf)
+
+    def read_screenshot(self, temp_dir, temp_img):
+        record_temp_files(temp_dir)
+        with open(temp_img, "rb") as f:
+            bio = io.BytesIO(f.read())
+        return Image.open(bio)
+
+    def enlarged_size(self, im, ss_width, ss_height):
+        """Window size to take the screenshot again with, or None if it fits."""
+        with phase("should_enlarge"):
             enlarge, ss_width, ss_height = self.should_enlarge(im, ss_width, ss_height)
-            if enlarge:
-                if ss_height < self.MAX_IMAGE_SIZE and ss_width < self.MAX_IMAGE_SIZE:
-                    return self.screenshot(html, ss_width, ss_height)
-                else:
-                    logger.warning(
-                        """Unable to enlarge image with Chrome, it is a known bug with version 111 and 112
-                        You could try to install an individual Chrome dev version and set `chrome_path` to it
-                        or try 'df.dfi.export('df.png', table_conversion="playwright")'"""
-                    )
-            return im
+        if not enlarge:
+            return None
+        if ss_height < self.MAX_IMAGE_SIZE and ss_width < self.MAX_IMAGE_SIZE:
+            return ss_width, ss_height
+        logger.warning(
+            """Unable to enlarge image with Chrome, it is a known bug with version 111 and 112
+            You could try to install an individual Chrome dev version and set `chrome_path` to it
+            or try 'df.dfi.export('df.png', table_conversion="playwright")'"""
+        )
+        return None
+
+    def screenshot(self, html, ss_width=1400, ss_height=900) -> Image:
+        while True:
+            with self.temp_dir() as temp_dir:
+                args, temp_img = self.prepare_screenshot(
+                    temp_dir, html, ss_width, ss_height
+                )
+                # chrome launches, loads the page and saves the screenshot in one go
+                with phase("browser"):
+                    self.run_chrome(args)
+                im = self.read_screenshot(temp_dir, temp_img)
+            size = self.enlarged_size(im, ss_width, ss_height)
+            if size is None:
+                return im
+            ss_width, ss_height = size
+
+    async def screenshot_async(self, html, ss_width=1400, ss_height=900) -> Image:
+        # the page is written, read and measured in a thread and chrome runs
+        # as an asyncio subprocess
+        while True:
+            with self.temp_dir() as temp_dir:
+                args, temp_img = await to_thread(
+                    self.prepare_screenshot, temp_dir, html, ss_width, ss_height
+                )
+                with phase("browser"):
+                    await self.run_chrome_async(args)
+                im = await to_thread(self.read_screenshot, temp_dir, temp_img)
+            size = await to_thread(self.enlarged_size, im, ss_width, ss_height)
+            if size is None:
+                return im
+            ss_width, ss_height = size
 
 
 def make_repr_png(center_df=True, max_rows=30, max_cols=10, chrome_path=None):
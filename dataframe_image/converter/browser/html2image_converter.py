@@ -1,4 +1,5 @@
 import io
+import threading
 from pathlib import Path
 
 from PIL import Image
@@ -7,6 +8,9 @@ from dataframe_image.logger import logger
 
 from .base import BrowserConverter
 
+# every Html2Image screenshot is written to the same file, only one may run at a time
+_screenshot_lock = threading.Lock()
+
 
 class Html2ImageConverter(BrowserConverter):
     def screenshot(
@@ -14,7 +18,7 @@ class Html2ImageConverter(BrowserConverter):
     ) -> Image:
         from html2image import Html2Image
 
-        css = self.get_css()
+        css = self.get_css(html)
         # use folder under home directory to avoid permission issues
         # snap version Chrome can only access files under home dir
         wd = Path.home() / ".cache" / "html2image"
@@ -27,13 +31,14 @@ class Html2ImageConverter(BrowserConverter):
             "--disable-gpu",
             "--hide-scrollbars",
         ]
-        outpaths = hti.screenshot(
-            html_str=html, css_str=css, size=(ss_width, ss_height)
-        )
-        temp_img = outpaths[0]
-        with open(temp_img, "rb") as f:
-            bio = io.BytesIO(f.read())
-            im = Image.open(bio)
+        with _screenshot_lock:
+            outpaths = hti.screenshot(
+                html_str=html, css_str=css, size=(ss_width, ss_height)
+            )
+            temp_img = outpaths[0]
+            with open(temp_img, "rb") as f:
+                bio = io.BytesIO(f.read())
+        im = Image.open(bio)
         enlarge, ss_width, ss_height = self.should_enlarge(im, ss_width, ss_height)
         if enlarge:
             if ss_height < self.MAX_IMAGE_SIZE and ss_width < self.MAX_IMAGE_SIZE:
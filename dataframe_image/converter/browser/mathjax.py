@@ -0,0 +1,226 @@
+import html as html_lib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+
+from dataframe_image.logger import logger
+
+MATHJAX_CDN = "https://cdn.jsdelivr.net/npm/mathjax@3/es5/tex-svg.js"
+MATHJAX_BUNDLE = "tex-svg.js"
+# where MathJax 3 is installed by npm and linux distributions
+MATHJAX_DIRS = [
+    Path.home() / ".dataframe_image" / "mathjax",
+    Path("/usr/share/nodejs/mathjax-full/es5"),
+    Path("/usr/share/javascript/mathjax3/es5"),
+    Path("/usr/lib/node_modules/mathjax/es5"),
+    Path("/usr/local/lib/node_modules/mathjax/es5"),
+]
+MATH_DELIMITERS = re.compile(r"\$|\\\(")
+# inline math within a single text node, as MathJax finds it. Escaped \$ are
+# text, as with MathJax's processEscapes
+MATH_SPAN = re.compile(r"(?<!\\)\$([^$<]+?)(?<!\\)\$|\\\(([^<]+?)\\\)")
+
+# the page sets window.dfiMathJaxReady once MathJax.startup.promise resolves,
+# i.e. when MathJax has loaded and typeset the page
+MATHJAX_CONFIG = """<script>
+MathJax = {
+    tex: {
+        inlineMath: [['$', '$'], ['\\\\(', '\\\\)']]
+    },
+    svg: {
+        fontCache: 'global'
+    },
+    startup: {
+        ready() {
+            MathJax.startup.defaultReady();
+            MathJax.startup.promise.then(() => { window.dfiMathJaxReady = true; });
+        }
+    }
+};
+</script>"""
+
+# a page typesetting formulas one by one into standalone svg elements, the
+# font paths are stored within each svg instead of a page wide cache
+MATHJAX_TYPESET_CONFIG = """<script>
+MathJax = {
+    svg: {
+        fontCache: 'local'
+    },
+    startup: {
+        typeset: false,
+        ready() {
+            MathJax.startup.defaultReady();
+            MathJax.startup.promise.then(() => { window.dfiMathJaxReady = true; });
+        }
+    }
+};
+</script>"""
+TYPESET_SCRIPT = """(formulas) => formulas.map((tex) => {
+    const svg = MathJax.tex2svg(tex, {display: false}).querySelector("svg");
+    return svg ? svg.outerHTML : null;
+})"""
+# typesets the formulas in the json of #dfi_formulas once MathJax is ready
+# and writes the svgs as json into #dfi_svgs, for browsers run without a
+# scripting interface
+TYPESET_PAGE_SCRIPT = (
+    """<script>
+window.addEventListener("load", () => {
+    if (!(window.MathJax && window.MathJax.version)) return;
+    MathJax.startup.promise.then(() => {
+        const formulas = JSON.parse(document.getElementById("dfi_formulas").textContent);
+        const svgs = (%s)(formulas);
+        document.getElementById("dfi_svgs").textContent = JSON.stringify(svgs);
+    });
+});
+</script>"""
+    % TYPESET_SCRIPT
+)
+
+# resolves once MathJax is ready, or at once when it could not be loaded and
+# MathJax is still the config object, which has no version
+MATHJAX_READY_SCRIPT = (
+    "() => window.dfiMathJaxReady === true"
+    " || !(window.MathJax && window.MathJax.version)"
+)
+MATHJAX_LOADED_SCRIPT = "() => window.dfiMathJaxReady === true"
+
+
+def has_math(html):
+    """Whether `html` contains the delimiters of inline math."""
+    return MATH_DELIMITERS.search(html) is not None
+
+
+def find_mathjax():
+    """
+    Path of a local MathJax 3 `tex-svg.js` bundle or None.
+
+    The environment variable DFI_MATHJAX_PATH may point to the bundle or to
+    a directory containing it, otherwise `~/.dataframe_image/mathjax` and the
+    usual npm and linux distribution locations are searched.
+    """
+    candidates = list(MATHJAX_DIRS)
+    env_path = os.environ.get("DFI_MATHJAX_PATH")
+    if env_path:
+        candidates.insert(0, Path(env_path))
+    for path in candidates:
+        if path.is_dir():
+            for bundle in (path / MATHJAX_BUNDLE, path / "es5" / MATHJAX_BUNDLE):
+                if bundle.is_file():
+                    return bundle
+        elif path.is_file():
+            return path
+    return None
+
+
+@lru_cache()
+def warn_no_local_mathjax():
+    logger.warning(
+        "No local MathJax found, loading it from %s. Set DFI_MATHJAX_PATH "
+        "to a MathJax 3 tex-svg.js to render formulas offline.",
+        MATHJAX_CDN,
+    )
+
+
+@lru_cache()
+def read_mathjax(path):
+    # a closing script tag in the bundle would end the inline script early
+    return Path(path).read_text(encoding="utf-8").replace("</script", "<\\/script")
+
+
+def get_mathjax_script(config=MATHJAX_CONFIG):
+    """
+    Script tags configuring and loading MathJax. A local bundle is inlined so
+    no network access is needed, the CDN is only used when none is found.
+    """
+    path = find_mathjax()
+    if path is None:
+        warn_no_local_mathjax()
+        return config + f'\n<script src="{MATHJAX_CDN}"></script>'
+    return config + f"\n<script>{read_mathjax(str(path))}</script>"
+
+
+def get_typeset_page(formulas=None):
+    """
+    Page loading MathJax to typeset formulas with `TYPESET_SCRIPT`. With
+    `formulas`, the page typesets them itself and writes the resulting svgs
+    as json into the #dfi_svgs element.
+    """
+    body = ""
+    if formulas is not None:
+        # script content is raw text, only a closing tag must be avoided
+        formulas_json = json.dumps(formulas).replace("</", "<\\/")
+        body = (
+            f'<script type="application/json" id="dfi_formulas">{formulas_json}</script>'
+            '<pre id="dfi_svgs"></pre>' + TYPESET_PAGE_SCRIPT
+        )
+    return (
+        '<!DOCTYPE html><html><head><meta charset="UTF-8"/>'
+        f"{get_mathjax_script(MATHJAX_TYPESET_CONFIG)}</head>"
+        f"<body>{body}</body></html>"
+    )
+
+
+def get_formula(match):
+    """TeX source of a `MATH_SPAN` match."""
+    return html_lib.unescape(match.group(1) or match.group(2)).strip()
+
+
+class FormulaCache:
+    """
+    Typeset formulas as svg keyed by their TeX source, shared by all exports
+    of the process. Tables with math repeat the same formulas, e.g. units
+    and symbols in every column name, and each of them is only typeset
+    once. The svgs are sized in ex, so they scale with the font size of the
+    table.
+
+    The least recently used formulas are dropped beyond `maxsize`.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.svgs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def missing(self, html):
+        """Unique formulas of `html` that are not cached yet."""
+        formulas = {get_formula(match) for match in MATH_SPAN.finditer(html)}
+        with self._lock:
+            return sorted(formula for formula in formulas if formula not in self.svgs)
+
+    def update(self, svgs):
+        with self._lock:
+            for formula, svg in svgs.items():
+                if svg:
+                    self.svgs[formula] = svg
+                    self.svgs.move_to_end(formula)
+            while len(self.svgs) > self.maxsize:
+                self.svgs.popitem(last=False)
+
+    def inline(self, html, svgs=None):
+        """
+        Replace the cached formulas of `html` by their svg. `svgs` of just
+        typeset formulas are used as well, in case they no longer fit.
+        """
+        svgs = svgs or {}
+
+        def replace(match):
+            formula = get_formula(match)
+            with self._lock:
+                svg = self.svgs.get(formula)
+                if svg is not None:
+                    self.svgs.move_to_end(formula)
+            svg = svg or svgs.get(formula)
+            return match.group(0) if svg is None else svg
+
+        return MATH_SPAN.sub(replace, html)
+
+    def clear(self):
+        with self._lock:
+            self.svgs.clear()
+
+
+FORMULA_CACHE = FormulaCache()
@@ -1,15 +1,34 @@
+import contextvars
 import math
+import queue
+import threading
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from io import BytesIO
 
 from PIL import Image
 
+from dataframe_image._timing import phase
 from dataframe_image.logger import logger
 
 from .base import BrowserConverter
+from .mathjax import (
+    FORMULA_CACHE,
+    MATHJAX_LOADED_SCRIPT,
+    MATHJAX_READY_SCRIPT,
+    TYPESET_SCRIPT,
+    get_typeset_page,
+)
+from .vector import FIT_PAGE_SCRIPT
 
 MATHJAX_TIMEOUT = 10000
+# milliseconds the page typesetting formulas may take to load MathJax, e.g.
+# from the CDN, before the formulas are left to the table page
+MATHJAX_LOAD_TIMEOUT = 5000
 SCREENSHOT_TIMEOUT = 1000
 MAX_TILE_SIDE = 4000
+# seconds a screenshot waits for the browser thread of the persistent converter
+REQUEST_TIMEOUT = 300
 
 
 class _PlayWrightBase(BrowserConverter):
@@ -55,6 +74,13 @@ class _PlayWrightBase(BrowserConverter):
             "chromium browser installed. Or install it by `playwright install chromium`."
         )
 
+    @staticmethod
+    def _mathjax_not_loaded_warning():
+        logger.warning(
+            "MathJax could not be loaded. Formula in dataframe are not rendered. "
+            "Set DFI_MATHJAX_PATH to a local MathJax 3 tex-svg.js."
+        )
+
     @staticmethod
     def _clip_from_rect(rect):
         clip_x = max(0, int(math.floor(rect["x"])))
@@ -112,17 +138,35 @@ class PlayWrightConverter(_PlayWrightBase):
                 pass
         raise error_cls(self._no_browser_error_message())
 
-    def _wait_for_mathjax(self, page, error_cls):
-        if not self.use_mathjax:
+    def _wait_for_mathjax(self, page, html, error_cls):
+        if not self.needs_mathjax(html):
             return
-        mj = page.locator("mjx-container math")
         try:
-            mj.wait_for(timeout=MATHJAX_TIMEOUT)
+            page.wait_for_function(MATHJAX_READY_SCRIPT, timeout=MATHJAX_TIMEOUT)
         except error_cls:
             logger.warning(
                 "MathJax did not render in time. Formula in dataframe may not be rendered correctly."
             )
-        page.wait_for_timeout(200)
+            return
+        if not page.evaluate(MATHJAX_LOADED_SCRIPT):
+            self._mathjax_not_loaded_warning()
+
+    def _prerender_formulas(self, page, html, error_cls):
+        # typeset the formulas missing from the cache in the same browser, so
+        # the table page loads plain svg
+        missing = FORMULA_CACHE.missing(html)
+        if not missing:
+            return html
+        try:
+            page.set_content(get_typeset_page(), timeout=MATHJAX_LOAD_TIMEOUT)
+            page.wait_for_function(MATHJAX_READY_SCRIPT, timeout=MATHJAX_TIMEOUT)
+        except error_cls:
+            return html
+        svgs = {}
+        if page.evaluate(MATHJAX_LOADED_SCRIPT):
+            svgs = dict(zip(missing, page.evaluate(TYPESET_SCRIPT, missing)))
+            FORMULA_CACHE.update(svgs)
+        return FORMULA_CACHE.inline(html, svgs)
 
     def _tiled_screenshot(self, page, locator):
         rect = locator.evaluate(self._TABLE_RECT_SCRIPT)
@@ -141,39 +185,171 @@ class PlayWrightConverter(_PlayWrightBase):
 
         return self._stitch_tiles(clip_width, clip_height, _take_tile)
 
-    def screenshot(self, html):
+    @staticmethod
+    def _import_playwright():
         try:
             from playwright.sync_api import Error, sync_playwright
         except ImportError as ex:
             raise ImportError(
                 "Playwright is not installed. Install it with 'pip install playwright' and make sure you have a chromium browser installed."
             ) from ex
+        return Error, sync_playwright
+
+    def _new_context(self, browser):
+        return browser.new_context(
+            device_scale_factor=self.device_scale_factor, bypass_csp=True
+        )
+
+    def _load_page(self, page, html, error_cls, build_html):
+        if self.needs_mathjax(html):
+            with phase("typeset_formulas"):
+                html = self._prerender_formulas(page, html, error_cls)
+        with phase("page_load"):
+            page.set_content(build_html(html))
+        # formulas change the size of the table, typeset them first
+        with phase("mathjax"):
+            self._wait_for_mathjax(page, html, error_cls)
+
+    def _print_page(self, page, html, error_cls):
+        self._load_page(page, html, error_cls, self.build_print_html)
+        page.evaluate(FIT_PAGE_SCRIPT)
+        return page.pdf(print_background=True, prefer_css_page_size=True)
+
+    def _screenshot_page(self, page, html, error_cls):
+        self._load_page(page, html, error_cls, self.build_valid_html)
+        locator = page.locator("#dfi_table table")
+        bbox = self._require_bbox(locator.bounding_box(), error_cls)
+        page.set_viewport_size(self._viewport_from_bbox(bbox))
+        try:
+            return locator.screenshot()
+        except error_cls as ex:
+            logger.warning(f"Locator screenshot failed. Taking full page screenshot instead. Error: {ex}")
+            try:
+                return page.screenshot(timeout=SCREENSHOT_TIMEOUT)
+            except error_cls as page_ex:
+                logger.warning(
+                    "Page screenshot failed. Falling back to tiled screenshots. "
+                    f"Error: {page_ex}"
+                )
+                return self._tiled_screenshot(page, locator)
+
+    def screenshot(self, html):
+        Error, sync_playwright = self._import_playwright()
 
         with sync_playwright() as p:
-            browser = self._launch_browser(p, Error)
+            with phase("browser_launch"):
+                browser = self._launch_browser(p, Error)
 
-            context = browser.new_context(
-                device_scale_factor=self.device_scale_factor, bypass_csp=True
+            page = self._new_context(browser).new_page()
+            screenshot_bytes = self._screenshot_page(page, html, Error)
+        return self._image_from_bytes(screenshot_bytes)
+
+    def print_pdf(self, html):
+        Error, sync_playwright = self._import_playwright()
+
+        with sync_playwright() as p:
+            with phase("browser_launch"):
+                browser = self._launch_browser(p, Error)
+
+            page = self._new_context(browser).new_page()
+            return self._print_page(page, html, Error)
+
+
+class PersistentPlayWrightConverter(PlayWrightConverter):
+    """
+    PlayWrightConverter keeping one browser open for all its screenshots
+    instead of launching one for each. The browser is launched on the first
+    screenshot and runs in a thread of its own, as the sync API of
+    Playwright can not be used from a thread running an event loop, such as
+    the main thread of a Jupyter kernel. `close` stops the browser.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._requests = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Launch the browser unless it is running, raising if it fails."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            started = Future()
+            self._thread = threading.Thread(
+                target=self._serve, args=(started,), name="dfi-browser", daemon=True
             )
-            page = context.new_page()
-            page.set_content(self.build_valid_html(html))
-            locator = page.locator("#dfi_table table")
-            bbox = self._require_bbox(locator.bounding_box(), Error)
-            page.set_viewport_size(self._viewport_from_bbox(bbox))
-            self._wait_for_mathjax(page, Error)
+            self._thread.start()
+        started.result()
+
+    def _serve(self, started):
+        try:
+            Error, sync_playwright = self._import_playwright()
+            with sync_playwright() as p:
+                browser = self._launch_browser(p, Error)
+                context = self._new_context(browser)
+                started.set_result(None)
+                while True:
+                    request = self._requests.get()
+                    if request is None:
+                        break
+                    html, result, ctx = request
+                    # phases are timed by the collector of the caller
+                    ctx.run(self._screenshot_request, context, html, result, Error)
+                browser.close()
+        except BaseException as ex:
+            if not started.done():
+                started.set_exception(ex)
+                return
+            raise
+        finally:
+            self._fail_requests()
+
+    def _fail_requests(self):
+        """Fail the screenshots still waiting for the stopped browser."""
+        while True:
             try:
-                screenshot_bytes = locator.screenshot()
-            except Error as ex:
-                logger.warning(f"Locator screenshot failed. Taking full page screenshot instead. Error: {ex}")
-                try:
-                    screenshot_bytes = page.screenshot(timeout=SCREENSHOT_TIMEOUT)
-                except Error as page_ex:
-                    logger.warning(
-                        "Page screenshot failed. Falling back to tiled screenshots. "
-                        f"Error: {page_ex}"
-                    )
-                    screenshot_bytes = self._tiled_screenshot(page, locator)
-        return self._image_from_bytes(screenshot_bytes)
+                request = self._requests.get_nowait()
+            except queue.Empty:
+                return
+            if request is not None:
+                request[1].set_exception(RuntimeError("The browser was closed."))
+
+    def _screenshot_request(self, context, html, result, error_cls):
+        page = context.new_page()
+        try:
+            result.set_result(self._screenshot_page(page, html, error_cls))
+        except Exception as ex:
+            result.set_exception(ex)
+        finally:
+            page.close()
+
+    def screenshot(self, html):
+        if self._thread is None or not self._thread.is_alive():
+            with phase("browser_launch"):
+                self.start()
+        thread = self._thread
+        result = Future()
+        self._requests.put((html, result, contextvars.copy_context()))
+        if thread is None or not thread.is_alive():
+            # the thread stopped after emptying the queue, nothing serves it
+            self._fail_requests()
+        try:
+            png = result.result(timeout=REQUEST_TIMEOUT)
+        except FutureTimeoutError:
+            raise RuntimeError(
+                f"The browser did not take the screenshot in {REQUEST_TIMEOUT} seconds."
+            ) from None
+        return self._image_from_bytes(png)
+
+    def close(self):
+        """Close the browser and wait for its thread to end."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread.is_alive():
+            self._requests.put(None)
+            thread.join()
 
 
 class AsyncPlayWrightConverter(_PlayWrightBase):
@@ -190,17 +366,33 @@ class AsyncPlayWrightConverter(_PlayWrightBase):
                 pass
         raise error_cls(self._no_browser_error_message())
 
-    async def _wait_for_mathjax(self, page, error_cls):
-        if not self.use_mathjax:
+    async def _wait_for_mathjax(self, page, html, error_cls):
+        if not self.needs_mathjax(html):
             return
-        mj = page.locator("mjx-container math")
         try:
-            await mj.wait_for(timeout=MATHJAX_TIMEOUT)
+            await page.wait_for_function(MATHJAX_READY_SCRIPT, timeout=MATHJAX_TIMEOUT)
         except error_cls:
             logger.warning(
                 "MathJax did not render in time. Formula in dataframe may not be rendered correctly."
             )
-        await page.wait_for_timeout(200)
+            return
+        if not await page.evaluate(MATHJAX_LOADED_SCRIPT):
+            self._mathjax_not_loaded_warning()
+
+    async def _prerender_formulas(self, page, html, error_cls):
+        missing = FORMULA_CACHE.missing(html)
+        if not missing:
+            return html
+        try:
+            await page.set_content(get_typeset_page(), timeout=MATHJAX_LOAD_TIMEOUT)
+            await page.wait_for_function(MATHJAX_READY_SCRIPT, timeout=MATHJAX_TIMEOUT)
+        except error_cls:
+            return html
+        svgs = {}
+        if await page.evaluate(MATHJAX_LOADED_SCRIPT):
+            svgs = dict(zip(missing, await page.evaluate(TYPESET_SCRIPT, missing)))
+            FORMULA_CACHE.update(svgs)
+        return FORMULA_CACHE.inline(html, svgs)
 
     async def _tiled_screenshot(self, page, locator):
         rect = await locator.evaluate(self._TABLE_RECT_SCRIPT)
@@ -228,12 +420,22 @@ class AsyncPlayWrightConverter(_PlayWrightBase):
         return output.getvalue()
 
     async def run(self, html: str) -> bytes:
-        im = await self.screenshot(html)
-        temp_img = self.crop(im)
-        image_bytes = self.finalize_image(temp_img)
-        return image_bytes
+        return await self.run_async(html)
 
-    async def screenshot(self, html):
+    async def run_scales(self, html: str, scales: list) -> list:
+        return await self.run_scales_async(html, scales)
+
+    async def run_vector(self, html: str, format: str = "pdf") -> bytes:
+        return await self.run_vector_async(html, format)
+
+    async def screenshot_async(self, html):
+        return await self.screenshot(html)
+
+    async def print_pdf_async(self, html):
+        return await self.print_pdf(html)
+
+    @staticmethod
+    def _import_playwright():
         try:
             from playwright.async_api import Error, async_playwright
         except ImportError as ex:
@@ -241,18 +443,44 @@ class AsyncPlayWrightConverter(_PlayWrightBase):
                 "Playwright is not installed. Install it with 'pip install playwright' "
                 "and make sure you have a chromium browser installed."
             ) from ex
+        return Error, async_playwright
+
+    async def _load_page(self, page, html, error_cls, build_html):
+        if self.needs_mathjax(html):
+            with phase("typeset_formulas"):
+                html = await self._prerender_formulas(page, html, error_cls)
+        with phase("page_load"):
+            await page.set_content(build_html(html))
+        # formulas change the size of the table, typeset them first
+        with phase("mathjax"):
+            await self._wait_for_mathjax(page, html, error_cls)
+
+    async def print_pdf(self, html):
+        Error, async_playwright = self._import_playwright()
+        async with async_playwright() as p:
+            with phase("browser_launch"):
+                browser = await self._launch_browser(p, Error)
+
+            context = await browser.new_context(bypass_csp=True)
+            page = await context.new_page()
+            await self._load_page(page, html, Error, self.build_print_html)
+            await page.evaluate(FIT_PAGE_SCRIPT)
+            return await page.pdf(print_background=True, prefer_css_page_size=True)
+
+    async def screenshot(self, html):
+        Error, async_playwright = self._import_playwright()
         async with async_playwright() as p:
-            browser = await self._launch_browser(p, Error)
+            with phase("browser_launch"):
+                browser = await self._launch_browser(p, Error)
 
             context = await browser.new_context(
                 device_scale_factor=self.device_scale_factor, bypass_csp=True
             )
             page = await context.new_page()
-            await page.set_content(self.build_valid_html(html))
+            await self._load_page(page, html, Error, self.build_valid_html)
             locator = page.locator("#dfi_table table")
             bbox = self._require_bbox(await locator.bounding_box(), Error)
             await page.set_viewport_size(self._viewport_from_bbox(bbox))
-            await self._wait_for_mathjax(page, Error)
             try:
                 screenshot_bytes = await locator.screenshot()
             except Error as ex:
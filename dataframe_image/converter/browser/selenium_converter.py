@@ -1,18 +1,17 @@
+import base64
 from pathlib import Path
 from tempfile import TemporaryDirectory
 
 from PIL import Image
 
+from dataframe_image._timing import record_temp_files
+
 from .base import BrowserConverter
+from .vector import PX_PER_CM
 
 
 class SeleniumConverter(BrowserConverter):
-    def screenshot(self, html: str) -> Image:
-        # by default Firefox will cleanup it's profile directory after closing
-        # so we need to set ignore_cleanup_errors=True
-
-        temp_dir_obj = TemporaryDirectory(prefix="dataframe_image_")
-        temp_dir = temp_dir_obj.name
+    def _firefox(self, temp_dir):
         try:
             import selenium.common
             import selenium.webdriver
@@ -33,13 +32,22 @@ class SeleniumConverter(BrowserConverter):
             raise ImportError(
                 "Selenium is not installed. Install it with 'pip install selenium' and make sure you have a firefox webdriver installed."
             )
+        return selenium.webdriver.Firefox(options=options, service=service)
+
+    def screenshot(self, html: str) -> Image:
+        # by default Firefox will cleanup it's profile directory after closing
+        # so we need to set ignore_cleanup_errors=True
 
+        temp_dir_obj = TemporaryDirectory(prefix="dataframe_image_")
+        temp_dir = temp_dir_obj.name
         temp_html = Path(temp_dir) / "temp.html"
         temp_img = Path(temp_dir) / "temp.png"
         with open(temp_html, "w", encoding="utf-8") as f:
-            f.write(self.get_css() + html)
+            f.write(self.get_css(html) + html)
 
-        with selenium.webdriver.Firefox(options=options, service=service) as driver:
+        # start the browser last, nothing can fail before it is closed
+        driver = self._firefox(temp_dir)
+        with driver:
             driver.get(temp_html.as_uri())  # selenium will do the rest
 
             # get "#dfi_table table" width and height
@@ -51,6 +59,7 @@ class SeleniumConverter(BrowserConverter):
             )
             driver.set_window_size(required_width + 150, required_height + 90)
             driver.save_screenshot(str(temp_img))
+            record_temp_files(temp_dir)
 
             # temp_img will be deleted after context exit
             img = Image.open(temp_img)
@@ -59,3 +68,33 @@ class SeleniumConverter(BrowserConverter):
         except OSError:
             pass
         return img
+
+    def print_pdf(self, html: str) -> bytes:
+        from selenium.webdriver.common.print_page_options import PrintOptions
+
+        temp_dir_obj = TemporaryDirectory(prefix="dataframe_image_")
+        temp_dir = temp_dir_obj.name
+        temp_html = Path(temp_dir) / "temp.html"
+        with open(temp_html, "w", encoding="utf-8") as f:
+            f.write(self.build_print_html(html))
+
+        # start the browser last, nothing can fail before it is closed
+        driver = self._firefox(temp_dir)
+        with driver:
+            driver.get(temp_html.as_uri())
+            # webdriver prints to the page size it is given, not to @page
+            size = driver.execute_script("return window.dfiFitPage()")
+            options = PrintOptions()
+            options.page_width = size["width"] / PX_PER_CM
+            options.page_height = size["height"] / PX_PER_CM
+            options.margin_top = options.margin_bottom = 0
+            options.margin_left = options.margin_right = 0
+            options.background = True
+            options.shrink_to_fit = False
+            pdf = base64.b64decode(driver.print_page(options))
+            record_temp_files(temp_dir)
+        try:
+            temp_dir_obj.cleanup()
+        except OSError:
+            pass
+        return pdf
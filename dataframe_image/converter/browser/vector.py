@@ -0,0 +1,41 @@
+VECTOR_FORMATS = ("pdf", "svg")
+
+# added at the end of the page body to print it: the table is moved to the
+# top left corner and the page is fitted to it. `dfiFitPage` is called again
+# by converters that wait for MathJax, as formulas change the table size.
+PRINT_PAGE = """
+<style>
+html, body {margin: 0; padding: 0;}
+#dfi_table {display: inline-grid;}
+* {-webkit-print-color-adjust: exact; print-color-adjust: exact;}
+</style>
+<style id="dfi_page"></style>
+<script>
+window.dfiFitPage = () => {
+    const rect = document.getElementById("dfi_table").getBoundingClientRect();
+    // one more pixel, so that rounding never breaks the table to a second page
+    const size = {width: Math.ceil(rect.width), height: Math.ceil(rect.height) + 1};
+    document.getElementById("dfi_page").textContent =
+        `@page {size: ${size.width}px ${size.height}px; margin: 0;}`;
+    return size;
+};
+window.dfiFitPage();
+</script>
+"""
+FIT_PAGE_SCRIPT = "() => window.dfiFitPage()"
+# CSS pixels per centimeter
+PX_PER_CM = 96 / 2.54
+
+
+def pdf_to_svg(pdf: bytes) -> bytes:
+    """Convert the first page of a PDF to SVG with PyMuPDF."""
+    try:
+        import fitz
+    except ImportError as ex:
+        raise ImportError(
+            "PyMuPDF is required to export svg with the browser converters. "
+            "Install it with 'pip install \"dataframe_image[svg]\"', "
+            "or use the pdf format."
+        ) from ex
+    with fitz.open(stream=pdf, filetype="pdf") as doc:
+        return doc[0].get_svg_image().encode("utf-8")
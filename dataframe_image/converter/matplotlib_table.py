@@ -1,16 +1,183 @@
 import base64
+import copy
 import io
 import textwrap
+from functools import lru_cache
 
-import cssutils
+import matplotlib as mpl
 import numpy as np
-from lxml.cssselect import CSSSelector
-from lxml.html import fromstring
+from matplotlib import colors as mcolors
 from matplotlib import lines as mlines
-from matplotlib import patches as mpatches
-from matplotlib.backends.backend_agg import RendererAgg
+from matplotlib.artist import Artist, allow_rasterization
+from matplotlib.backends.backend_agg import (
+    FigureCanvasAgg,
+    RendererAgg,
+    get_hinting_flag,
+)
+from matplotlib.cbook import is_math_text
+from matplotlib.collections import PolyCollection
 from matplotlib.figure import Figure
-from matplotlib.transforms import Bbox
+from matplotlib.font_manager import FontProperties, findfont, get_font
+from matplotlib.transforms import Affine2D
+from PIL import Image
+
+from .._async import to_thread
+from .._timing import phase, record_size
+from .table_model import TableModel
+
+# smallest font size tables are shrunk to when fitting them into a document
+MIN_DOCUMENT_FONTSIZE = 12
+
+# raster formats encoded from the canvas buffer, mapped to their PIL names
+PIL_FORMATS = {
+    "png": "png",
+    "jpg": "jpeg",
+    "jpeg": "jpeg",
+    "tif": "tiff",
+    "tiff": "tiff",
+    "webp": "webp",
+}
+
+
+class TextMeasurer:
+    """
+    Measure the rendered width of text in pixels without creating artists.
+
+    Widths are cached by (text, weight, fontsize). Printable ASCII text is
+    measured by summing per-glyph advance widths, everything else (unicode,
+    mathtext) goes through the Agg renderer's text extent API.
+    """
+
+    def __init__(self, dpi, maxsize=2**16):
+        self.dpi = dpi
+        self.renderer = RendererAgg(1, 1, dpi)
+        self._props = {}
+        self._advances = {}
+        self.width = lru_cache(maxsize=maxsize)(self._width)
+
+    def get_prop(self, weight, fontsize):
+        key = (weight, fontsize)
+        if key not in self._props:
+            self._props[key] = FontProperties(size=fontsize, weight=weight)
+        return self._props[key]
+
+    def get_advances(self, weight, fontsize):
+        key = (weight, fontsize)
+        if key not in self._advances:
+            font = get_font(findfont(self.get_prop(weight, fontsize)))
+            font.set_size(fontsize, self.dpi)
+            flags = get_hinting_flag()
+            self._advances[key] = {
+                chr(code): font.load_char(code, flags=flags).linearHoriAdvance / 65536
+                for code in range(32, 127)
+            }
+        return self._advances[key]
+
+    def _width(self, text, weight, fontsize):
+        if "\n" in text:
+            return max(self.width(line, weight, fontsize) for line in text.split("\n"))
+        ismath = is_math_text(text)
+        if text.isascii() and text.isprintable() and not ismath:
+            advances = self.get_advances(weight, fontsize)
+            return sum(advances[char] for char in text)
+        prop = self.get_prop(weight, fontsize)
+        width, _, _ = self.renderer.get_text_width_height_descent(text, prop, ismath)
+        return width
+
+
+class CellTexts(Artist):
+    """
+    Draw the text of every table cell as a single artist.
+
+    Lays out and draws each cell exactly like a vertically centered `Text`
+    with the given horizontal alignment, but without creating, updating and
+    drawing thousands of separate `Text` artists for large tables.
+    """
+
+    zorder = 3
+    linespacing = 1.2
+
+    def __init__(self, fontsize):
+        super().__init__()
+        self.fontsize = fontsize
+        self.cells = []
+        self._props = {}
+
+    def add_cell(self, x, y, text, ha, weight, color):
+        if text:
+            self.cells.append((x, y, text, ha, weight, color))
+
+    def get_prop(self, weight):
+        if weight not in self._props:
+            self._props[weight] = FontProperties(size=self.fontsize, weight=weight)
+        return self._props[weight]
+
+    def layout(self, renderer, text, ha, weight, metrics):
+        """return the offset of each line from the anchor point, in pixels"""
+
+        def get_metrics(line, ismath):
+            key = (line, weight, ismath)
+            if key not in metrics:
+                metrics[key] = renderer.get_text_width_height_descent(
+                    line, self.get_prop(weight), ismath
+                )
+            return metrics[key]
+
+        _, lp_h, lp_d = get_metrics("lp", False)
+        min_dy = (lp_h - lp_d) * self.linespacing
+        lines = []
+        ws = []
+        ys = []
+        thisy = 0
+        for i, line in enumerate(text.split("\n")):
+            ismath = is_math_text(line)
+            if not ismath:
+                line = line.replace(r"\$", "$")
+            w, h, d = get_metrics(line, ismath) if line else (0, 0, 0)
+            h = max(h, lp_h)
+            d = max(d, lp_d)
+            if i == 0:
+                thisy = -(h - d)
+            else:
+                thisy -= max(min_dy, (h - d) * self.linespacing)
+            lines.append((line, ismath))
+            ws.append(w)
+            ys.append(thisy)
+            thisy -= d
+
+        width = max(ws)
+        offsety = (ys[-1] - d) / 2
+        if ha == "center":
+            xs = [(width - w) / 2 - width / 2 for w in ws]
+        elif ha == "right":
+            xs = [-w for w in ws]
+        else:
+            xs = [0 for w in ws]
+        return [(line, ismath, x, y - offsety) for (line, ismath), x, y in zip(lines, xs, ys)]
+
+    @allow_rasterization
+    def draw(self, renderer):
+        if not self.get_visible() or not self.cells:
+            return
+        renderer.open_group("cell_texts", self.get_gid())
+        positions = self.get_transform().transform([cell[:2] for cell in self.cells])
+        _, canvash = renderer.get_canvas_width_height()
+        gc = renderer.new_gc()
+        gc.set_antialiased(mpl.rcParams["text.antialiased"])
+        self._set_gc_clip(gc)
+        metrics = {}
+        for (posx, posy), (_, _, text, ha, weight, color) in zip(positions, self.cells):
+            gc.set_foreground(color)
+            prop = self.get_prop(weight)
+            for line, ismath, x, y in self.layout(renderer, text, ha, weight, metrics):
+                x = x + posx
+                y = y + posy
+                if renderer.flipy():
+                    y = canvash - y
+                renderer.draw_text(gc, x, y, line, prop, 0, ismath=ismath)
+        gc.restore()
+        renderer.close_group("cell_texts")
+        self.stale = False
 
 
 class MatplotlibTableConverter:
@@ -37,206 +204,165 @@ class MatplotlibTableConverter:
         self.dpi = 100
         self.savefig_dpi = savefig_dpi
         self.format = format
+        self.fig = None
+        self.canvas = None
+        self.measurer = TextMeasurer(self.dpi)
 
-    def parse_html(self, tree):
-
-        rows, num_header_rows = self.parse_into_rows(tree)
-        num_cols = sum(val[-1] for val in rows[0])
-        new_rows = []
-        rowspan = {}
-        # deal with muti-row or multi col cells
-        for i, row in enumerate(rows):
-            new_row = []
-            col_loc = 0
-            j = 0
-            while col_loc < num_cols:
-                if col_loc in rowspan:
-                    val = rowspan[col_loc]
-                    val[-2] -= 1
-                    cur_col_loc = 0
-                    for _ in range(val[-1]):
-                        cur_col_loc += 1
-                        new_row.append(val[:5])
-                    if val[-2] == 1:
-                        del rowspan[col_loc]
-                    col_loc += cur_col_loc
-                else:
-                    val = row[j]
-                    if val[-2] > 1:  # new rowspan detected
-                        rowspan[col_loc] = val
-                    col_loc += val[-1]  # usually 1
-                    for _ in range(val[-1]):
-                        new_row.append(val[:5])
-                    j += 1
-            new_rows.append(new_row)
-        return new_rows, num_header_rows
-
-    def get_text_align(self, element):
-        style = element.get("style", "").lower()
-        if "text-align" in style:
-            idx = style.find("text-align")
-            text_align = style[idx + 10 :].split(":")[1].strip()
-            for val in ("left", "right", "center"):
-                if text_align.startswith(val):
-                    return val
-
-    def parse_into_rows(self, tree):
-        def get_property(element, property_name):
-            for rule in sheet:
-                cssselector = CSSSelector(rule.selectorText)
-                matching = cssselector(element)
-                if matching:
-                    for style_property in rule.style:
-                        if style_property.name == property_name:
-                            return style_property.value
-
-        def parse_row(row):
-            values = []
-            # rowspan_dict = {}
-            # colspan_total = 0
-            row_align = self.get_text_align(row)
-            for el in row.xpath(".//td|.//th"):
-                bold = el.tag == "th"
-                colspan = int(el.get("colspan", 1))
-                rowspan = int(el.get("rowspan", 1))
-                text_align = self.get_text_align(el) or row_align
-                text = el.text_content().strip()
-                if "id" in el.attrib:
-                    values.append(
-                        [
-                            text,
-                            bold,
-                            text_align,
-                            get_property(el, "background-color"),
-                            get_property(el, "color"),
-                            rowspan,
-                            colspan,
-                        ]
-                    )
-                else:
-                    values.append(
-                        [text, bold, text_align, "#ffffff", "#000000", rowspan, colspan]
-                    )
-            return values
-
-        style = tree.find(".//style")
-        if style is not None:
-            sheet = cssutils.parseString(style.text)
-        else:
-            sheet = []
-
-        rows = []
-        thead = tree.find(".//thead")
-        tbody = tree.find(".//tbody")
-
-        if thead is not None:
-            head_rows = thead.findall(".//tr")
-            if head_rows:
-                for row in head_rows:
-                    rows.append(parse_row(row))
-            else:
-                rows.append(parse_row(thead))
-
-        num_header_rows = len(rows)
-
-        if tbody is not None:
-            for row in tbody.findall(".//tr"):
-                rows.append(parse_row(row))
-
-        if not len(thead) and not len(tbody):
-            for row in tree.findall(".//tr"):
-                rows.append(parse_row(row))
+    def get_text_width(self, text, weight=None):
+        return self.measurer.width(text, weight, self.fontsize)
 
-        return rows, num_header_rows
+    def get_cell_width(self, text, row_idx):
+        weight = "bold" if row_idx == 0 else None
+        return max(self.get_text_width(line, weight) for line in text.split("\n"))
 
-    def get_text_width(self, text, weight=None):
-        fig = self.text_fig
-        t = fig.text(0, 0, text, size=self.fontsize, weight=weight)
-        bbox = t.get_window_extent(renderer=self.renderer)
-        return bbox.width
-
-    def get_all_text_widths(self, rows):
-        all_text_widths = []
-        for i, row in enumerate(rows):
-            row_widths = []
-            for vals in row:
-                cell_max_width = 0
-                for text in vals[0].split("\n"):
-                    weight = "bold" if i == 0 else None
-                    cell_max_width = max(
-                        cell_max_width, self.get_text_width(text, weight)
-                    )
-                row_widths.append(cell_max_width)
-            all_text_widths.append(row_widths)
+    def get_all_text_widths(self, texts):
+        all_text_widths = [
+            [self.get_cell_width(text, i) for text in row]
+            for i, row in enumerate(texts)
+        ]
         # pad = 10  # number of pixels to pad columns with
         return np.array(all_text_widths) + 15
 
     def calculate_col_widths(self):
-        all_text_widths = self.get_all_text_widths(self.rows)
+        all_text_widths = self.get_all_text_widths(self.table.text)
         max_col_widths = all_text_widths.max(axis=0)
-        mult = 1
         total_width = self.figwidth * self.dpi
         if self.for_document and sum(max_col_widths) >= total_width:
-            while mult > 0.5:
-                mult *= 0.9
-                for idx in np.argsort(-max_col_widths):
-                    col_widths = all_text_widths[:, idx]
-                    rows = self.wrap_col(idx, col_widths, mult)
-                    all_text_widths = self.get_all_text_widths(rows)
-                    max_col_widths = all_text_widths.max(axis=0)
-                    if sum(max_col_widths) < total_width:
-                        break
-
-            if mult <= 0.5 and self.fontsize > 12:
-                self.fontsize *= 0.9
-                return self.calculate_col_widths()
-            else:
-                self.rows = rows
-                total_width = sum(max_col_widths)
+            max_col_widths = self.fit_to_width(total_width)
+            # squeeze into the page when even the smallest font is too wide
+            total_width = max(total_width, sum(max_col_widths))
 
         col_prop = [width / total_width for width in max_col_widths]
         return col_prop
 
-    def wrap_col(self, idx, col_widths, mult):
-        rows = self.rows.copy()
-        max_width = max(col_widths)
-        texts = [row[idx][0] for row in self.rows]
-        new_texts = []
-        new_max_width = 0
-        for i, (text, col_width) in enumerate(zip(texts, col_widths)):
-            if col_width > mult * max_width and len(text) > self.wrap_length:
-                width = max(self.wrap_length, int(len(text) * mult))
-                new_text = textwrap.fill(text, width, break_long_words=False)
-                new_texts.append(new_text)
-                new_max_width = max(new_max_width, self.get_text_width(new_text))
+    def fit_to_width(self, total_width):
+        """
+        Wrap long columns and shrink the font until the table is narrower than
+        `total_width` pixels. The font is shrunk in steps of 10% down to
+        MIN_DOCUMENT_FONTSIZE, binary searching for the largest step that fits,
+        which is the original size when wrapping alone fits the table.
+        Updates the cell texts and fontsize and returns the column widths.
+        """
+        fontsizes = [self.fontsize]
+        while fontsizes[-1] > MIN_DOCUMENT_FONTSIZE:
+            fontsizes.append(fontsizes[-1] * 0.9)
+
+        texts = self.table.text.tolist()
+        layouts = {}
+        lo, hi = 0, len(fontsizes) - 1
+        while lo <= hi:
+            mid = (lo + hi) // 2
+            self.fontsize = fontsizes[mid]
+            layouts[mid] = self.wrap_to_width(texts, total_width)
+            if layouts[mid][0]:
+                hi = mid - 1
             else:
-                new_texts.append(text)
+                lo = mid + 1
+
+        # smallest font if nothing fits, else the largest font that fits
+        best = min(lo, len(fontsizes) - 1)
+        self.fontsize = fontsizes[best]
+        if best not in layouts:
+            layouts[best] = self.wrap_to_width(texts, total_width)
+        _, new_texts, max_col_widths = layouts[best]
+        self.table.text[:, :] = new_texts
+        return max_col_widths
+
+    def wrap_to_width(self, texts, total_width):
+        """
+        Wrap the widest columns first, allowing each column to shrink further
+        on every pass, until the table fits or the columns are at half their
+        width. Only the wrapped column is measured again after each step.
+        """
+        text_widths = self.get_all_text_widths(texts)
+        widths = text_widths.copy()
+        new_texts = [row.copy() for row in texts]
+        max_col_widths = widths.max(axis=0)
+        mult = 1
+        fits = sum(max_col_widths) < total_width
+        while not fits and mult > 0.5:
+            mult *= 0.9
+            for idx in np.argsort(-max_col_widths):
+                self.wrap_col(idx, texts, text_widths, new_texts, widths, mult)
+                max_col_widths[idx] = widths[:, idx].max()
+                if sum(max_col_widths) < total_width:
+                    fits = True
+                    break
+        return fits, new_texts, max_col_widths
+
+    def wrap_col(self, idx, texts, text_widths, new_texts, widths, mult):
+        """
+        Wrap the cells of column `idx` that are wider than `mult` times the
+        widest unwrapped cell, writing into `new_texts` and `widths` when that
+        makes the column narrower.
+        """
+        max_width = text_widths[:, idx].max()
+        col_texts = [row[idx] for row in new_texts]
+        col_widths = widths[:, idx].copy()
+        for i, row in enumerate(texts):
+            text = row[idx]
+            if text_widths[i, idx] > mult * max_width and len(text) > self.wrap_length:
+                width = max(self.wrap_length, int(len(text) * mult))
+                col_texts[i] = textwrap.fill(text, width, break_long_words=False)
+                col_widths[i] = self.get_cell_width(col_texts[i], i) + 15
 
-        if new_max_width < max_width:
-            for row, text in zip(rows, new_texts):
-                row[idx][0] = text
-        return rows
+        if col_widths.max() < widths[:, idx].max():
+            for row, text in zip(new_texts, col_texts):
+                row[idx] = text
+            widths[:, idx] = col_widths
 
     def get_row_heights(self):
         row_heights = []
-        for row in self.rows:
-            row_count = max([val[0].count("\n") + 1 for val in row])
+        for row in self.table.text:
+            row_count = max([text.count("\n") + 1 for text in row])
             height = (row_count + 1) * self.fontsize / 72
             row_heights.append(height)
 
         return row_heights
 
-    def print_table(self):
+    @staticmethod
+    def rect_verts(x, y, width, height):
+        return [(x, y), (x + width, y), (x + width, y + height), (x, y + height)]
+
+    def get_crop(self, x0, y0, figheight):
+        """
+        Return the left and bottom edges and the size, in inches, of the area
+        of the layout that is drawn. Tables narrower than the layout are
+        centered with a small margin, wider tables extend past both of its
+        edges. `y0` is the bottom of the table as a fraction of the height.
+        """
+        start = self.figwidth * min(x0, 0.1)
+        left = start - 0.1
+        bottom = y0 * figheight
+        width = self.figwidth - 2 * start + 0.2
+        return left, bottom, width, figheight - bottom
+
+    def get_figure(self, width, height, dpi):
+        """
+        Return the figure and canvas, cleared and resized. Both are created on
+        the first call and reused by later conversions.
+        """
+        if self.fig is None:
+            self.fig = Figure()
+            self.canvas = FigureCanvasAgg(self.fig)
+        else:
+            self.fig.clear()
+        self.fig.set_dpi(dpi)
+        self.fig.set_size_inches(width, height)
+        return self.fig
+
+    def print_table(self, scales=None):
+        """
+        Draw the laid out table and encode it, or encode it once for each of
+        `scales`, ratios of the dpi, from the same figure.
+        """
         figheight = sum(self.row_heights)
 
         # check table caption
-        caption = self.tree.find(".//table//caption")
+        caption = self.table.caption
         if caption is not None:
-            caption_text = caption.text_content().strip()
             figheight += self.fontsize / 72
 
-        self.fig = Figure(dpi=self.dpi, figsize=(self.figwidth, figheight))
-
         row_colors = ["#f5f5f5", "#ffffff"]
         # padding 0.5 em
         padding = self.fontsize / (self.figwidth * self.dpi) * 0.5
@@ -244,57 +370,70 @@ class MatplotlibTableConverter:
 
         row_locs = [height / figheight for height in self.row_heights]
 
-        header_text_align = [vals[2] for vals in self.rows[0]]
+        table = self.table
+        header_text_align = [table.style(0, j).align for j in range(table.shape[1])]
         x0 = (1 - total_width) / 2
+        y0 = 1 - sum(row_locs)
+        if caption is not None:
+            y0 -= row_locs[0]
+
+        # the layout is computed as fractions of a figwidth x figheight area,
+        # the figure only covers the part of it that ends up in the image
+        left, bottom, width, height = self.get_crop(x0, y0, figheight)
+        dpi = self.savefig_dpi or mpl.rcParams["savefig.dpi"]
+        if dpi == "figure":
+            dpi = self.dpi
+        fig = self.get_figure(width, height, dpi)
+        transform = (
+            Affine2D().scale(self.figwidth, figheight).translate(-left, -bottom)
+            + fig.dpi_scale_trans
+        )
+
         x = x0
         yd = row_locs[0]
         y = 1
 
         # table caption
         if caption is not None:
-            self.fig.text(
+            fig.text(
                 0.5,
                 1 - yd / 2,
-                caption_text,
+                caption,
                 size=self.fontsize,
                 ha="center",
                 va="center",
                 weight="bold",
+                transform=transform,
             )
             y -= yd
 
-        for i, (yd, row) in enumerate(zip(row_locs, self.rows)):
+        # cell backgrounds and text are drawn as two artists in total
+        # instead of one patch and one text per cell
+        rects = []
+        rect_colors = []
+        cell_texts = CellTexts(self.fontsize)
+        for i, (yd, row, row_style_ids) in enumerate(
+            zip(row_locs, table.text, table.style_ids)
+        ):
             x = x0
             y -= yd
             # table zebra stripes
-            diff = i - self.num_header_rows
+            diff = i - table.num_header_rows
             if diff >= 0 and diff % 2 == 0:
-                p = mpatches.Rectangle(
-                    (x0, y),
-                    width=total_width,
-                    height=yd,
-                    fill=True,
-                    color=row_colors[0],
-                    transform=self.fig.transFigure,
-                )
-                self.fig.add_artist(p)
-            for j, (xd, val) in enumerate(zip(self.col_widths, row)):
-                text = val[0]
-                weight = "bold" if val[1] else None
-                ha = val[2] or header_text_align[j] or "right"
-                fg = val[4] if val[4] else "#000000"
-                bg = val[3] if val[3] else None
+                rects.append(self.rect_verts(x0, y, total_width, yd))
+                rect_colors.append(row_colors[0])
+            for j, (xd, text, style_id) in enumerate(
+                zip(self.col_widths, row, row_style_ids)
+            ):
+                style = table.styles[style_id]
+                weight = "bold" if style.bold else None
+                ha = style.align or header_text_align[j] or "right"
+                fg = style.color if style.color else "#000000"
+                bg = style.background if style.background else None
 
                 if bg:
-                    rect_bg = mpatches.Rectangle(
-                        (x, y),
-                        width=xd,
-                        height=yd,
-                        fill=True,
-                        color=bg,
-                        transform=self.fig.transFigure,
-                    )
-                    self.fig.add_artist(rect_bg)
+                    rects.append(self.rect_verts(x, y, xd, yd))
+                    rect_colors.append(bg)
 
                 if ha == "right":
                     x_pos = x + xd - padding
@@ -303,43 +442,124 @@ class MatplotlibTableConverter:
                 elif ha == "left":
                     x_pos = x + padding
 
-                self.fig.text(
-                    x_pos,
-                    y + yd / 2,
-                    text,
-                    size=self.fontsize,
-                    ha=ha,
-                    va="center",
-                    weight=weight,
-                    color=fg,
-                    # backgroundcolor=bg
-                )
+                cell_texts.add_cell(x_pos, y + yd / 2, text, ha, weight, fg)
                 x += xd
 
-            if i == self.num_header_rows - 1:
-                line = mlines.Line2D([x0, x0 + total_width], [y, y], color="black")
-                self.fig.add_artist(line)
+            if i == table.num_header_rows - 1:
+                line = mlines.Line2D(
+                    [x0, x0 + total_width], [y, y], color="black", transform=transform
+                )
+                fig.add_artist(line)
 
-        w, h = self.fig.get_size_inches()
-        start = self.figwidth * min(x0, 0.1)
-        end = self.figwidth - start
-        bbox = Bbox([[start - 0.1, y * h], [end + 0.1, h]])
-        buffer = io.BytesIO()
-        self.fig.savefig(
-            buffer, bbox_inches=bbox, dpi=self.savefig_dpi, format=self.format
+        cell_backgrounds = PolyCollection(
+            rects,
+            facecolors=rect_colors,
+            edgecolors=rect_colors,
+            transform=transform,
         )
-        img_str = buffer.getvalue()
+        fig.add_artist(cell_backgrounds)
+        cell_texts.set_transform(transform)
+        fig.add_artist(cell_texts)
+
+        if scales is None:
+            return self.encode(dpi)
+        # the artists are laid out in inches, so only the rasterization
+        # changes with the dpi
+        # rounded so that a ratio of dpis gives back the exact dpi
+        return [self.encode(round(dpi * scale, 6)) for scale in scales]
+
+    def encode(self, dpi):
+        self.fig.set_dpi(dpi)
+        img_str = self.encode_figure(dpi)
         if self.encode_base64:
             img_str = base64.b64encode(img_str).decode()
         return img_str
 
-    def run(self, html):
+    def encode_figure(self, dpi):
+        """
+        Draw the figure once and encode it. Raster formats are encoded from
+        the canvas buffer with PIL, other formats are written by matplotlib.
+        """
+        buffer = io.BytesIO()
+        pil_format = PIL_FORMATS.get(self.format.lower())
+        if pil_format is None:
+            with phase("savefig"):
+                self.fig.savefig(buffer, dpi=dpi, format=self.format)
+            return buffer.getvalue()
+
+        facecolor = self.get_savefig_facecolor()
+        with phase("draw"):
+            self.fig.patch.set_facecolor(facecolor)
+            self.canvas.draw()
+        with phase("encode"):
+            buffer_rgba = np.asarray(self.canvas.buffer_rgba())
+            record_size("bitmap_canvas", buffer_rgba.nbytes)
+            img = Image.fromarray(buffer_rgba)
+            if mcolors.to_rgba(facecolor)[3] == 1:
+                # the background is opaque, the alpha channel is dropped
+                img = img.convert("RGB")
+            elif pil_format == "jpeg":
+                # blended against white, as savefig does for jpeg
+                img = Image.alpha_composite(
+                    Image.new("RGBA", img.size, "white"), img
+                ).convert("RGB")
+            img.save(buffer, format=pil_format, dpi=(dpi, dpi))
+        return buffer.getvalue()
+
+    @staticmethod
+    def get_savefig_facecolor():
+        """
+        Background of the image from the savefig rcParams, which `savefig`
+        applies and drawing the canvas does not.
+        """
+        if mpl.rcParams["savefig.transparent"]:
+            return "none"
+        facecolor = mpl.rcParams["savefig.facecolor"]
+        if isinstance(facecolor, str) and facecolor == "auto":
+            facecolor = mpl.rcParams["figure.facecolor"]
+        return facecolor
+
+    def layout(self, table):
+        """Measure the cells of `table`, html is parsed into a TableModel."""
         self.fontsize = self.original_fontsize
-        self.text_fig = Figure(dpi=self.dpi)
-        self.renderer = RendererAgg(self.figwidth, self.figheight, self.dpi)
-        html = html.replace("<br></br>", "\n").replace("<br>", "\n").replace("<br/>", "\n")
-        self.tree = fromstring(html)
-        self.rows, self.num_header_rows = self.parse_html(self.tree)
-        self.col_widths = self.calculate_col_widths()
-        self.row_heights = self.get_row_heights()
+        if isinstance(table, str):
+            table = TableModel.from_html(table)
+        else:
+            # wrapping text changes the cells, keep the caller's model intact
+            table = copy.copy(table)
+            table.text = table.text.copy()
+        self.table = table
+        with phase("layout"):
+            self.col_widths = self.calculate_col_widths()
+            self.row_heights = self.get_row_heights()
+
+    def run(self, table):
+        """
+        Args:
+            table (TableModel or str): The table to convert, html is parsed
+                into a TableModel first.
+
+        Returns:
+            bytes: The converted image bytes.
+        """
+        self.layout(table)
         return self.print_table()
+
+    def run_scales(self, table, scales):
+        """
+        Lay the table out and draw it once, and encode it at each of `scales`,
+        ratios of `savefig_dpi`.
+
+        Returns:
+            list: The converted image bytes, in the order of `scales`.
+        """
+        self.layout(table)
+        return self.print_table(scales)
+
+    async def run_async(self, table):
+        """Same as `run` in a thread, drawing does not block the event loop."""
+        return await to_thread(self.run, table)
+
+    async def run_scales_async(self, table, scales):
+        """Same as `run_scales` in a thread."""
+        return await to_thread(self.run_scales, table, scales)
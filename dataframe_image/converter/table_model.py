@@ -0,0 +1,332 @@
+import re
+from collections import namedtuple
+
+import numpy as np
+from pandas import get_option
+from pandas.io.formats.format import DataFrameFormatter
+from pandas.io.formats.html import NotebookFormatter
+from pandas.io.formats.printing import pprint_thing
+
+# a selector consisting only of an id, as generated by Styler for each cell
+ID_SELECTOR = re.compile(r"#[\w-]+")
+SPAN_TAG = re.compile(r'(rowspan|colspan)="(\d+)"')
+BR_TAG = re.compile(r"<br\s*/?>(</br>)?")
+
+CellStyle = namedtuple("CellStyle", ["bold", "align", "background", "color"])
+
+DEFAULT_BACKGROUND = "#ffffff"
+DEFAULT_COLOR = "#000000"
+
+
+class TableModel:
+    """
+    Converter independent representation of a table.
+
+    Cells are stored on the expanded grid: a cell spanning several rows or
+    columns is repeated at every position it covers, and its span is stored
+    at its top left position (covered positions hold a span of 0). Styles
+    are interned, each cell only holds an index into `styles`.
+
+    Attributes:
+        text (np.ndarray): (rows, cols) object array with the text of each cell
+        style_ids (np.ndarray): (rows, cols) array of indices into `styles`
+        styles (list): interned `CellStyle` tuples
+        rowspan (np.ndarray): (rows, cols) array of row spans
+        colspan (np.ndarray): (rows, cols) array of column spans
+        num_header_rows (int): number of rows belonging to the table header
+        caption (str): the table caption or None
+    """
+
+    def __init__(
+        self, text, style_ids, styles, rowspan, colspan, num_header_rows, caption=None
+    ):
+        self.text = text
+        self.style_ids = style_ids
+        self.styles = styles
+        self.rowspan = rowspan
+        self.colspan = colspan
+        self.num_header_rows = num_header_rows
+        self.caption = caption
+
+    @property
+    def shape(self):
+        return self.text.shape
+
+    def style(self, i, j):
+        return self.styles[self.style_ids[i, j]]
+
+    @classmethod
+    def from_rows(cls, rows, num_header_rows, caption=None):
+        """
+        Build the model from rows of `[text, style, rowspan, colspan]` cells
+        as they appear in an html table, i.e. without the positions covered
+        by spanning cells.
+        """
+        num_rows = len(rows)
+        num_cols = sum(cell[3] for cell in rows[0]) if rows else 0
+        text = np.full((num_rows, num_cols), "", dtype=object)
+        style_ids = np.zeros((num_rows, num_cols), dtype=np.int32)
+        rowspan = np.zeros((num_rows, num_cols), dtype=np.int32)
+        colspan = np.zeros((num_rows, num_cols), dtype=np.int32)
+        interned = {}
+        # column -> rows still covered by a rowspan started above
+        covered = {}
+        for i, row in enumerate(rows):
+            cells = iter(row)
+            col = 0
+            while col < num_cols:
+                if covered.get(col, 0) > 0:
+                    covered[col] -= 1
+                    col += 1
+                    continue
+                cell = next(cells, None)
+                if cell is None:
+                    break
+                cell_text, style, row_span, col_span = cell
+                style_id = interned.setdefault(style, len(interned))
+                rowspan[i, col] = row_span
+                colspan[i, col] = col_span
+                end_row = min(i + row_span, num_rows)
+                text[i:end_row, col : col + col_span] = cell_text
+                style_ids[i:end_row, col : col + col_span] = style_id
+                for c in range(col, col + col_span):
+                    covered[c] = row_span - 1
+                col += col_span
+        styles = list(interned)
+        return cls(text, style_ids, styles, rowspan, colspan, num_header_rows, caption)
+
+    @classmethod
+    def from_frame(cls, df, max_rows=None, max_cols=None):
+        """
+        Build the model from a DataFrame without generating html. The cells,
+        truncation and spans are the same as `df.to_html(notebook=True)`.
+        """
+        formatter = DataFrameFormatter(
+            df, max_rows=max_rows, max_cols=max_cols, bold_rows=True
+        )
+        collector = RowCollector(formatter)
+        collector.render()
+        return cls.from_rows(collector.rows, collector.num_header_rows)
+
+    @classmethod
+    def from_styler(cls, styler, max_rows=None, max_cols=None):
+        """
+        Build the model from a Styler without generating html. The computed
+        styles, hidden rows and columns, display formatting and truncation are
+        taken from the render context pandas builds for `Styler.to_html`.
+        Styles are only computed for the cells within `max_rows` and
+        `max_cols`, see `truncate_styler`.
+
+        Table styles use arbitrary css selectors, so Stylers that set them, as
+        well as Stylers from pandas versions without `Styler._render`, are
+        converted through html.
+        """
+        if styler.table_styles or not hasattr(styler, "_render"):
+            from ..pd_html import styler2html
+
+            return cls.from_html(styler2html(styler, max_rows, max_cols))
+
+        from ..pd_html import truncate_styler
+
+        d = truncate_styler(styler, max_rows, max_cols)._render(
+            get_option("styler.sparse.index"),
+            get_option("styler.sparse.columns"),
+            max_rows,
+            max_cols,
+        )
+        # per cell css keyed by the element id, resolved the same way as the
+        # generated <style> element: the last declaration within a rule and
+        # the first rule setting a property win
+        props = {}
+        for rule in d["cellstyle"] + d["cellstyle_index"] + d["cellstyle_columns"]:
+            declarations = dict(rule["props"])
+            for selector in rule["selectors"]:
+                properties = props.setdefault(selector, {})
+                for name, value in declarations.items():
+                    properties.setdefault(name, value)
+
+        rows = []
+        for row in d["head"] + d["body"]:
+            cells = []
+            for cell in row:
+                if cell.get("is_visible") is False:
+                    continue
+                bold = cell["type"] == "th"
+                if "id" in cell:
+                    properties = props.get(cell["id"], {})
+                    style = CellStyle(
+                        bold,
+                        None,
+                        properties.get("background-color"),
+                        properties.get("color"),
+                    )
+                else:
+                    style = CellStyle(bold, None, DEFAULT_BACKGROUND, DEFAULT_COLOR)
+                spans = dict(SPAN_TAG.findall(cell.get("attributes", "")))
+                rowspan = int(spans.get("rowspan", 1))
+                colspan = int(spans.get("colspan", 1))
+                text = get_display_text(cell["display_value"])
+                cells.append([text, style, rowspan, colspan])
+            rows.append(cells)
+
+        caption = d["caption"]
+        if caption is not None:
+            caption = get_display_text(caption)
+        return cls.from_rows(rows, len(d["head"]), caption)
+
+    @classmethod
+    def from_html(cls, html):
+        """Build the model by parsing an html table and its `<style>` element."""
+        from lxml.html import fromstring
+
+        html = html.replace("<br></br>", "\n").replace("<br>", "\n").replace("<br/>", "\n")
+        tree = fromstring(html)
+        rows, num_header_rows = parse_into_rows(tree)
+        caption = tree.find(".//table//caption")
+        if caption is not None:
+            caption = caption.text_content().strip()
+        return cls.from_rows(rows, num_header_rows, caption)
+
+
+class RowCollector(NotebookFormatter):
+    """
+    Collect the rows pandas writes for `to_html(notebook=True)` as lists of
+    cells instead of html markup.
+    """
+
+    def __init__(self, formatter):
+        super().__init__(formatter)
+        self.rows = []
+        self.num_header_rows = 0
+
+    def write(self, s, indent=0):
+        pass
+
+    def write_tr(
+        self,
+        line,
+        indent=0,
+        indent_delta=0,
+        header=False,
+        align=None,
+        tags=None,
+        nindex_levels=0,
+    ):
+        tags = tags or {}
+        row = []
+        for i, s in enumerate(line):
+            spans = dict(SPAN_TAG.findall(tags.get(i) or ""))
+            bold = header or (self.bold_rows and i < nindex_levels)
+            style = CellStyle(bold, align, DEFAULT_BACKGROUND, DEFAULT_COLOR)
+            rowspan = int(spans.get("rowspan", 1))
+            colspan = int(spans.get("colspan", 1))
+            row.append([pprint_thing(s).strip(), style, rowspan, colspan])
+        self.rows.append(row)
+        if header:
+            self.num_header_rows += 1
+
+
+def get_display_text(value):
+    """Text of a Styler display value, which may contain html markup."""
+    text = str(value)
+    if "<" in text or "&" in text:
+        from lxml.html import fragment_fromstring
+
+        text = BR_TAG.sub("\n", text)
+        text = fragment_fromstring(text, create_parent="span").text_content()
+    return text.strip()
+
+
+def get_text_align(element):
+    style = element.get("style", "").lower()
+    if "text-align" in style:
+        idx = style.find("text-align")
+        text_align = style[idx + 10 :].split(":")[1].strip()
+        for val in ("left", "right", "center"):
+            if text_align.startswith(val):
+                return val
+
+
+def get_style_index(tree, sheet):
+    """
+    Map each element of the tree to the css properties that apply to it.
+
+    Every rule's selector is compiled and matched once. Rules made only of
+    id selectors, which is what Styler produces for per cell styles, are
+    looked up by id directly. The first matching rule setting a property
+    wins.
+    """
+    from lxml.cssselect import CSSSelector
+
+    ids = {el.get("id"): el for el in tree.xpath("//*[@id]")}
+    index = {}
+    for rule in sheet:
+        if rule.type != rule.STYLE_RULE:
+            continue
+        selectors = [sel.strip() for sel in rule.selectorText.split(",")]
+        if all(ID_SELECTOR.fullmatch(sel) for sel in selectors):
+            elements = [ids[sel[1:]] for sel in selectors if sel[1:] in ids]
+        else:
+            elements = CSSSelector(rule.selectorText)(tree)
+        for el in elements:
+            properties = index.setdefault(el, {})
+            for style_property in rule.style:
+                properties.setdefault(style_property.name, style_property.value)
+    return index
+
+
+def parse_into_rows(tree):
+    import cssutils
+
+    def parse_row(row):
+        values = []
+        row_align = get_text_align(row)
+        for el in row.xpath(".//td|.//th"):
+            bold = el.tag == "th"
+            colspan = int(el.get("colspan", 1))
+            rowspan = int(el.get("rowspan", 1))
+            text_align = get_text_align(el) or row_align
+            text = el.text_content().strip()
+            if "id" in el.attrib:
+                properties = style_index.get(el, {})
+                style = CellStyle(
+                    bold,
+                    text_align,
+                    properties.get("background-color"),
+                    properties.get("color"),
+                )
+            else:
+                style = CellStyle(bold, text_align, DEFAULT_BACKGROUND, DEFAULT_COLOR)
+            values.append([text, style, rowspan, colspan])
+        return values
+
+    style = tree.find(".//style")
+    if style is not None:
+        sheet = cssutils.parseString(style.text)
+    else:
+        sheet = []
+    style_index = get_style_index(tree, sheet)
+
+    rows = []
+    thead = tree.find(".//thead")
+    tbody = tree.find(".//tbody")
+
+    if thead is not None:
+        head_rows = thead.findall(".//tr")
+        if head_rows:
+            for row in head_rows:
+                rows.append(parse_row(row))
+        else:
+            rows.append(parse_row(thead))
+
+    num_header_rows = len(rows)
+
+    if tbody is not None:
+        for row in tbody.findall(".//tr"):
+            rows.append(parse_row(row))
+
+    if not rows:
+        for row in tree.findall(".//tr"):
+            rows.append(parse_row(row))
+
+    return rows, num_header_rows
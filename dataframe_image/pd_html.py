@@ -1,11 +1,108 @@
+from collections import defaultdict
+
+import numpy as np
 import pandas as pd
 from packaging import version
 
+PANDAS_1_4 = version.parse(pd.__version__) >= version.parse("1.4")
+
 
-def styler2html(style):
+def styler2html(style, max_rows=None, max_cols=None):
     """convert dataframe and sytler to html base on different pandas version"""
-    if version.parse(pd.__version__) >= version.parse("1.4"):
-        html = style.to_html()
+    if PANDAS_1_4:
+        style = truncate_styler(style, max_rows, max_cols)
+        html = style.to_html(max_rows=max_rows, max_columns=max_cols)
     else:
         html = style.render()
     return html
+
+
+def visible_positions(hidden, length, limit):
+    """The first `limit` positions out of `length` that are not `hidden`."""
+    hidden = set(hidden)
+    positions = [i for i in range(length) if i not in hidden]
+    return positions[:limit]
+
+
+def truncate_styler(style, max_rows=None, max_cols=None):
+    """
+    Copy of the Styler that only computes css for the cells rendered when
+    truncating to `max_rows` and `max_cols`.
+
+    Styles stay the same as for the full DataFrame. Elementwise functions
+    only run on the rendered cells, functions applied per row on the rendered
+    rows and functions applied per column on the rendered columns, which still
+    see whole columns so e.g. gradients keep their range. Only the results for
+    the rendered cells are turned into css, which runs in Python for every
+    cell. The returned Styler must be rendered with the same `max_rows` and
+    `max_cols`, which add the "..." rows and columns of the truncated part.
+    """
+    if max_rows is None and max_cols is None:
+        return style
+    # shallow copy, rendering it must not change the ctx of the original
+    style = style._copy()
+    style.ctx = defaultdict(list)
+    style.ctx_index = defaultdict(list)
+    style.ctx_columns = defaultdict(list)
+
+    rows = visible_positions(style.hidden_rows, len(style.index), max_rows)
+    cols = visible_positions(style.hidden_columns, len(style.columns), max_cols)
+    row_labels = style.index[rows]
+    col_labels = style.columns[cols]
+    update_ctx = style._update_ctx
+    update_ctx_header = style._update_ctx_header
+
+    def _update_ctx(attrs):
+        attrs = attrs.loc[attrs.index.isin(row_labels), attrs.columns.isin(col_labels)]
+        update_ctx(attrs)
+
+    def _update_ctx_header(attrs, axis):
+        # header attrs are indexed by position along the axis
+        attrs = attrs.loc[attrs.index.isin(rows if axis == 0 else cols)]
+        update_ctx_header(attrs, axis)
+
+    style._update_ctx = _update_ctx
+    style._update_ctx_header = _update_ctx_header
+    todos = [narrow_todo(style, todo, row_labels, col_labels) for todo in style._todo]
+    style._todo = [todo for todo in todos if todo is not None]
+    return style
+
+
+def narrow_todo(style, todo, row_labels, col_labels):
+    """
+    Restrict the subset of a style function to the rendered rows and columns
+    along the axes its results do not depend on. Returns None for functions
+    that do not style any rendered cell.
+    """
+    from pandas.io.formats.style_render import non_reducing_slice
+
+    method, args, kwargs = todo
+    # arrays such as a gradient map must match the shape of the subset
+    if not all(np.ndim(value) == 0 for value in kwargs.values()):
+        return todo
+    name = method(style).__name__
+    if name in ("_map", "_applymap"):
+        func, subset = args
+        narrow_rows = narrow_cols = True
+    elif name == "_apply":
+        func, axis, subset = args
+        axis = None if axis is None else style.data._get_axis_number(axis)
+        # functions applied per column need all rows and vice versa
+        narrow_rows = axis == 1
+        narrow_cols = axis == 0
+    else:
+        return todo
+
+    subset = slice(None) if subset is None else subset
+    data = style.data.loc[non_reducing_slice(subset)]
+    rows, cols = data.index, data.columns
+    if narrow_rows:
+        rows = rows[rows.isin(row_labels)]
+    if narrow_cols:
+        cols = cols[cols.isin(col_labels)]
+    if rows.empty or cols.empty:
+        return None
+    subset = pd.IndexSlice[rows.tolist(), cols.tolist()]
+    if name == "_apply":
+        return method, (func, axis, subset), kwargs
+    return method, (func, subset), kwargs
@@ -0,0 +1,127 @@
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from zipfile import ZipFile
+
+from dataframe_image import _bundler
+
+
+class FakeHandler:
+    def __init__(self, **query):
+        self.query = query
+        self.headers = {}
+        self.status = 200
+        self.body = io.BytesIO()
+        self.json = None
+
+    def get_query_argument(self, name, default=None):
+        return self.query.get(name, default)
+
+    def set_status(self, status):
+        self.status = status
+
+    def set_header(self, name, value):
+        self.headers[name] = value
+
+    def write(self, chunk):
+        if isinstance(chunk, dict):
+            self.json = chunk
+        elif isinstance(chunk, str):
+            self.body.write(chunk.encode())
+        else:
+            self.body.write(chunk)
+
+    def flush(self):
+        pass
+
+    def finish(self):
+        pass
+
+
+def test_zip_download_is_built_in_memory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    converter = SimpleNamespace(
+        document_name="report",
+        to={"md"},
+        return_data={
+            "md_data": "![](report_files/output_1_0.png)",
+            "md_images": {"output_1_0.png": b"\x89PNG"},
+            "image_dir_name": "report_files",
+        },
+    )
+    handler = FakeHandler()
+    _bundler.write_download(handler, converter)
+
+    assert handler.headers["Content-Type"] == "application/zip"
+    assert "report.zip" in handler.headers["Content-Disposition"]
+    assert os.listdir(tmp_path) == []
+    with ZipFile(handler.body) as zf:
+        assert sorted(zf.namelist()) == ["report.md", "report_files/output_1_0.png"]
+        assert zf.read("report_files/output_1_0.png") == b"\x89PNG"
+
+
+def test_pdf_download_is_sent_unencoded():
+    converter = SimpleNamespace(
+        document_name="report", to={"pdf_latex"}, return_data={"pdf_data": b"%PDF-1.5"}
+    )
+    handler = FakeHandler()
+    _bundler.write_download(handler, converter)
+
+    assert handler.headers["Content-Type"] == "application/pdf"
+    assert handler.body.getvalue() == b"%PDF-1.5"
+
+
+def test_bundle_returns_job_immediately(monkeypatch):
+    release = threading.Event()
+
+    def fake_run_conversion(kwargs):
+        release.wait(5)
+        return _bundler.ConversionResult(
+            "report", {"pdf_latex"}, {"pdf_data": b"%PDF-1.5"}, True
+        )
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(_bundler, "_get_executor", lambda: executor)
+    monkeypatch.setattr(_bundler, "run_conversion", fake_run_conversion)
+    monkeypatch.setattr(_bundler, "get_convert_kwargs", lambda model, handler: {})
+
+    handler = FakeHandler(app_status="waiting")
+    _bundler.bundle(handler, {"path": "report.ipynb"})
+    job_id = next(iter(_bundler._jobs))
+    assert job_id in handler.body.getvalue().decode()
+
+    handler = FakeHandler(app_status="status", job_id=job_id)
+    _bundler.bundle(handler, {})
+    assert handler.json["status"] in ("queued", "running")
+
+    release.set()
+    executor.shutdown(wait=True)
+
+    handler = FakeHandler(app_status="status", job_id=job_id)
+    _bundler.bundle(handler, {})
+    assert handler.json["status"] == "done"
+
+    handler = FakeHandler(app_status="download", job_id=job_id)
+    _bundler.bundle(handler, {})
+    assert handler.body.getvalue() == b"%PDF-1.5"
+    assert job_id not in _bundler._jobs
+
+
+def test_pool_is_replaced_after_a_worker_dies(monkeypatch):
+    monkeypatch.setattr(_bundler, "_executor", None)
+    # kill a worker, the way the OOM killer would
+    broken = _bundler._get_executor()
+    assert broken.submit(os._exit, 1).exception(60) is not None
+
+    job_id = _bundler.submit_job(
+        {"filename": "missing.ipynb", "document_name": "missing"}
+    )
+    try:
+        result = _bundler._jobs.pop(job_id).future.result(120)
+        assert not result.success
+        assert "BrokenProcessPool" not in result.error_msg
+        assert _bundler._executor is not broken
+    finally:
+        _bundler._executor.shutdown(wait=True)
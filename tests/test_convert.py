@@ -1,5 +1,7 @@
+import json
 from pathlib import Path
 from sys import platform
+from types import SimpleNamespace
 
 import pytest
 
@@ -51,9 +53,147 @@ class TestConvertMD:
             document_name=document_name,
             no_input=no_input,
             output_dir="tests/test_output",
+            kernel_pool_size=1,
         )
 
 
+def test_kernel_pool(tmp_path):
+    import nbformat
+
+    sources = [
+        "import os\nx = 1\nprint(os.getpid())",
+        "import os\nprint(os.getpid(), 'x' in globals(), os.getcwd())",
+    ]
+    outputs = []
+    for i, source in enumerate(sources):
+        notebook_dir = tmp_path / f"notebook_{i}"
+        notebook_dir.mkdir()
+        nb = nbformat.v4.new_notebook(cells=[nbformat.v4.new_code_cell(source)])
+        nbformat.write(nb, notebook_dir / "pool.ipynb")
+        convert(
+            notebook_dir / "pool.ipynb",
+            to="md",
+            execute=True,
+            table_conversion="matplotlib",
+            kernel_pool_size=1,
+        )
+        outputs.append((notebook_dir / "pool.md").read_text())
+    pid = outputs[0].split("```")[-1].strip()
+    # the same kernel ran the second notebook, reset and in its directory
+    assert f"{pid} False {tmp_path / 'notebook_1'}" in outputs[1]
+
+
+def test_to_md_skips_unchanged_images(tmp_path):
+    def convert_md():
+        convert(
+            "tests/notebooks/Test 1 EXECUTED.ipynb",
+            to="md",
+            document_name="images",
+            table_conversion="matplotlib",
+            output_dir=tmp_path,
+        )
+
+    convert_md()
+    image_dir = tmp_path / "Test 1 EXECUTED_files"
+    mtimes = {path.name: path.stat().st_mtime_ns for path in image_dir.iterdir()}
+    assert mtimes
+    stale = image_dir / "stale.png"
+    stale.write_bytes(b"stale")
+    changed = next(iter(mtimes))
+    (image_dir / changed).write_bytes(b"changed")
+    convert_md()
+
+    assert not stale.exists()
+    assert (image_dir / changed).read_bytes() != b"changed"
+    del mtimes[changed]
+    assert mtimes == {
+        path.name: path.stat().st_mtime_ns
+        for path in image_dir.iterdir()
+        if path.name != changed
+    }
+    md = (tmp_path / "images.md").read_text()
+    for name in mtimes:
+        assert f"Test%201%20EXECUTED_files/{name}" in md
+
+
+def test_replace_all():
+    from dataframe_image._convert import replace_all
+
+    links = {"output_1_0.png": "nb_files/output_1_0.png", "1_0.png": "nb_files/1_0.png"}
+    text = "![](output_1_0.png) ![](1_0.png)"
+    assert replace_all(text, links) == "![](nb_files/output_1_0.png) ![](nb_files/1_0.png)"
+
+
+@pytest.mark.parametrize("limit", [None, 0, 2, -1])
+@pytest.mark.parametrize("filename", filenames)
+def test_read_notebook(filename, limit):
+    import nbformat
+
+    from dataframe_image._notebook import read_notebook
+
+    with open(filename) as f:
+        expected = nbformat.read(f, as_version=4)
+    if limit is not None:
+        expected["cells"] = expected["cells"][:limit]
+    assert read_notebook(filename, limit) == expected
+
+
+def test_json_stream_chunks():
+    import io
+
+    from dataframe_image._notebook import JSONStream
+
+    values = [{"a": 'x"y\\', "b": [1, -2.5e3, True, None, "}{]["]}, [], "s", 123456]
+    text = "[" + ", ".join(json.dumps(value) for value in values) + " ]"
+    # values and numbers cut by the chunks are read on
+    for chunk_size in range(1, 8):
+        stream = JSONStream(io.StringIO(text), chunk_size)
+        stream.expect("[")
+        decoded = [stream.decode()]
+        while stream.expect(",]") == ",":
+            decoded.append(stream.decode())
+        assert decoded == values
+
+
+def test_profile(document_name, capsys):
+    profile_output = Path("tests/test_output") / f"{document_name}.json"
+    convert(
+        "tests/notebooks/Test 1 EXECUTED.ipynb",
+        to="md",
+        document_name=document_name,
+        table_conversion="matplotlib",
+        output_dir="tests/test_output",
+        profile=True,
+        profile_output=profile_output,
+    )
+    assert "Slowest tables" in capsys.readouterr().err
+    profile = json.loads(profile_output.read_text())
+    assert {"no_execute_preprocess", "MarkdownPreprocessor", "to_md"} <= set(
+        profile["steps"]
+    )
+    assert profile["tables"]
+    assert profile["slowest_tables"][0]["seconds"] == max(
+        table["seconds"] for table in profile["tables"]
+    )
+
+
+def test_code_to_run_installs_repr_png(monkeypatch):
+    import pandas as pd
+    from pandas.io.formats.style import Styler
+
+    from dataframe_image._convert import Converter
+
+    # the code patches these classes, restore them afterwards
+    monkeypatch.setattr(pd.DataFrame, "_repr_png_", None, raising=False)
+    monkeypatch.setattr(Styler, "_repr_png_", None, raising=False)
+    options = SimpleNamespace(
+        center_df=True, max_rows=30, max_cols=10, chrome_path="/path/to/chrome"
+    )
+    exec(Converter.get_code_to_run(options), {})
+    assert callable(pd.DataFrame._repr_png_)
+    assert Styler._repr_png_ is pd.DataFrame._repr_png_
+
+
 # @pytest.mark.parametrize("use", uses)
 # class TestConvertOther:
 #     def test_save_notebook(self, use):
@@ -1,7 +1,10 @@
+import asyncio
 import platform
 import random
 import string
 import sys
+import threading
+import time
 from io import BytesIO
 
 import numpy as np
@@ -51,6 +54,17 @@ def test_styled(document_name, converter, dpi):
     )
 
 
+@pytest.mark.parametrize("converter", converters)
+def test_styled_truncated(document_name, converter):
+    big = pd.DataFrame(np.arange(50_000.0).reshape(1000, 50))
+    big.style.background_gradient().export_png(
+        f"tests/test_output/{document_name}.png",
+        table_conversion=converter,
+        max_rows=20,
+        max_cols=8,
+    )
+
+
 @pytest.mark.parametrize("converter", converters)
 def test_styled2(document_name, converter):
     col_headers = {
@@ -90,6 +104,149 @@ async def test_styled2_async(document_name):
     )
 
 
+def test_persistent_playwright(document_name):
+    from dataframe_image.converter.browser import PersistentPlayWrightConverter
+
+    converter = PersistentPlayWrightConverter(encode_base64=False)
+    try:
+        first = converter.run(df.head().to_html())
+        thread = converter._thread
+        second = converter.run(df.tail().to_html())
+        # both images are taken by the browser launched for the first
+        assert converter._thread is thread
+    finally:
+        converter.close()
+    assert first.startswith(b"\x89PNG") and second.startswith(b"\x89PNG")
+    with open(f"tests/test_output/{document_name}.png", "wb") as f:
+        f.write(second)
+
+
+def test_persistent_playwright_stopped_thread(monkeypatch):
+    from dataframe_image.converter.browser import PersistentPlayWrightConverter
+    from dataframe_image.converter.browser import playwright_converter
+
+    converter = PersistentPlayWrightConverter(encode_base64=False)
+    # a browser thread that stopped after emptying the queue
+    stopped = threading.Thread(target=lambda: None)
+    stopped.start()
+    stopped.join()
+    monkeypatch.setattr(converter, "start", lambda: setattr(converter, "_thread", stopped))
+    with pytest.raises(RuntimeError, match="closed"):
+        converter.screenshot(df.head().to_html())
+
+    # a browser thread that never answers
+    release = threading.Event()
+    stuck = threading.Thread(target=release.wait, daemon=True)
+    stuck.start()
+    converter._thread = stuck
+    monkeypatch.setattr(playwright_converter, "REQUEST_TIMEOUT", 0.1)
+    try:
+        with pytest.raises(RuntimeError, match="did not take"):
+            converter.screenshot(df.head().to_html())
+    finally:
+        release.set()
+
+
+@pytest.mark.asyncio
+async def test_export_async_does_not_block_loop(document_name):
+    df = pd.DataFrame(np.random.rand(100, 10))
+    gaps = []
+
+    async def tick():
+        loop = asyncio.get_running_loop()
+        last = loop.time()
+        while True:
+            await asyncio.sleep(0.005)
+            gaps.append(loop.time() - last)
+            last = loop.time()
+
+    ticker = asyncio.ensure_future(tick())
+    await dfi.export_async(
+        df,
+        f"tests/test_output/{document_name}.png",
+        table_conversion="matplotlib",
+    )
+    ticker.cancel()
+    # drawing alone takes longer than this, it ran in a thread
+    assert len(gaps) > 5
+    assert max(gaps) < 0.2
+
+
+@pytest.mark.asyncio
+async def test_export_async_concurrency_limit(document_name, monkeypatch):
+    from dataframe_image.converter.matplotlib_table import MatplotlibTableConverter
+
+    monkeypatch.setenv("DFI_MAX_CONCURRENT_EXPORTS", "2")
+    running = []
+    peak = []
+    run = MatplotlibTableConverter.run
+
+    def counting_run(self, table):
+        running.append(1)
+        peak.append(len(running))
+        try:
+            time.sleep(0.05)
+            return run(self, table)
+        finally:
+            running.pop()
+
+    monkeypatch.setattr(MatplotlibTableConverter, "run", counting_run)
+    # each test runs in a new loop, its semaphore is sized from the environment
+    await asyncio.gather(
+        *(
+            dfi.export_async(
+                df.head(),
+                f"tests/test_output/{document_name}_{i}.png",
+                table_conversion="matplotlib",
+            )
+            for i in range(6)
+        )
+    )
+    assert max(peak) == 2
+
+
+@pytest.mark.asyncio
+async def test_export_async_html2image_one_at_a_time(document_name, monkeypatch):
+    import html2image
+    from PIL import Image
+
+    running = []
+    peak = []
+
+    class FakeHtml2Image:
+        def __init__(self, output_path, **kwargs):
+            self.output_path = output_path
+            self.browser = type("Browser", (), {})()
+
+        def screenshot(self, html_str, css_str, size):
+            running.append(1)
+            peak.append(len(running))
+            try:
+                time.sleep(0.05)
+                path = f"{self.output_path}/screenshot.png"
+                im = Image.new("RGB", (200, 100), "white")
+                im.paste((0, 0, 0), (10, 10, 100, 50))
+                im.save(path)
+                return [path]
+            finally:
+                running.pop()
+
+    monkeypatch.setenv("DFI_MAX_CONCURRENT_EXPORTS", "4")
+    monkeypatch.setattr(html2image, "Html2Image", FakeHtml2Image)
+    await asyncio.gather(
+        *(
+            dfi.export_async(
+                df.head(),
+                f"tests/test_output/{document_name}_{i}.png",
+                table_conversion="html2image",
+                chrome_path="chrome",
+            )
+            for i in range(4)
+        )
+    )
+    assert max(peak) == 1
+
+
 @pytest.mark.parametrize("dpi", test_dpi_values)
 @pytest.mark.parametrize("converter", converters)
 def test_huge_df(document_name, converter, dpi):
@@ -102,6 +259,107 @@ def test_huge_df(document_name, converter, dpi):
     )
 
 
+@pytest.mark.parametrize("converter", converters)
+def test_multiple_dpi(document_name, converter):
+    from PIL import Image
+
+    stats = df.tail(10).dfi.export(
+        f"tests/test_output/{document_name}.png",
+        table_conversion=converter,
+        dpi=test_dpi_values,
+    )
+    sizes = [
+        Image.open(f"tests/test_output/{document_name}@{scale}x.png").size
+        for scale in (1, 2, 3)
+    ]
+    for (width, height), scale in zip(sizes, (1, 2, 3)):
+        assert abs(width - sizes[-1][0] * scale / 3) <= 1
+        assert abs(height - sizes[-1][1] * scale / 3) <= 1
+    # the table is laid out once for all the images
+    assert stats.counts.get("layout", 1) == 1
+    assert stats.counts.get("screenshot", 1) == 1
+
+
+@pytest.mark.parametrize("extension", ["pdf", "svg"])
+@pytest.mark.parametrize("converter", converters)
+def test_multiple_dpi_vector(document_name, converter, extension):
+    # vector files are the same at every dpi
+    with pytest.raises(ValueError):
+        df.tail(10).dfi.export(
+            f"tests/test_output/{document_name}.{extension}",
+            table_conversion=converter,
+            dpi=test_dpi_values,
+        )
+
+
+@pytest.mark.parametrize("converter", converters)
+def test_export_pages(document_name, converter):
+    df = pd.DataFrame(np.random.randint(0, 100, size=(250, 45)))
+    filenames = df.dfi.export_pages(
+        f"tests/test_output/{document_name}_{{page}}.png",
+        rows_per_page=100,
+        cols_per_page=30,
+        table_conversion=converter,
+    )
+    assert len(filenames) == 6
+
+
+def test_export_pages_html2image(document_name):
+    from PIL import Image
+
+    df = pd.DataFrame(np.arange(40 * 3).reshape(40, 3))
+    filenames = df.dfi.export_pages(
+        f"tests/test_output/{document_name}_{{page}}.png",
+        rows_per_page=10,
+        table_conversion="html2image",
+    )
+    images = [Image.open(name).tobytes() for name in filenames]
+    # each page holds its own rows, none was overwritten by another page
+    assert len(set(images)) == len(filenames) == 4
+
+    with pytest.raises(ValueError):
+        df.dfi.export_pages(
+            f"tests/test_output/{document_name}_{{page}}.png",
+            rows_per_page=10,
+            table_conversion="html2image",
+            max_workers=2,
+        )
+
+
+def test_export_pages_braces_in_filename(tmp_path):
+    # only the placeholder is replaced, other braces are part of the path
+    folder = tmp_path / "{run}"
+    folder.mkdir()
+    df = pd.DataFrame(np.arange(30).reshape(15, 2))
+    filenames = df.dfi.export_pages(
+        str(folder / "{}_{page}.png"), rows_per_page=10, table_conversion="matplotlib"
+    )
+    assert filenames == [str(folder / "{}_1.png"), str(folder / "{}_2.png")]
+
+    with pytest.raises(ValueError):
+        df.dfi.export_pages(str(folder / "{}.png"), table_conversion="matplotlib")
+
+
+def test_export_pages_from_chunks(document_name):
+    from dataframe_image._pandas_accessor import iter_pages
+
+    df = pd.DataFrame(np.arange(230 * 3).reshape(230, 3))
+    chunks = (df.iloc[i : i + 70] for i in range(0, len(df), 70))
+    pages = list(iter_pages(chunks, 100, 2))
+    assert [page.shape for page in pages] == [
+        (100, 2), (100, 1), (100, 2), (100, 1), (30, 2), (30, 1)
+    ]
+    pd.testing.assert_frame_equal(pd.concat(pages[::2]), df.iloc[:, :2])
+
+    chunks = (df.iloc[i : i + 70] for i in range(0, len(df), 70))
+    filenames = dfi.export_pages(
+        chunks,
+        f"tests/test_output/{document_name}_{{page}}.png",
+        table_conversion="matplotlib",
+    )
+    assert filenames[-1] == f"tests/test_output/{document_name}_3.png"
+
+
 def test_svg(document_name):
     dstyle = df.style.background_gradient()
     dfi.export(
@@ -109,6 +367,30 @@ def test_svg(document_name):
     )
 
 
+@pytest.mark.parametrize("extension", ["pdf", "svg"])
+@pytest.mark.parametrize("converter", ["chrome", "selenium", "playwright"])
+def test_vector(document_name, converter, extension):
+    if extension == "svg":
+        pytest.importorskip("fitz")
+    filename = f"tests/test_output/{document_name}.{extension}"
+    stats = df.tail(10).dfi.export(filename, table_conversion=converter)
+    with open(filename, "rb") as f:
+        data = f.read()
+    if extension == "pdf":
+        assert data.startswith(b"%PDF")
+    else:
+        assert b"<svg" in data[:1000]
+    # printed, not captured
+    assert "screenshot" not in stats.timings
+
+
+def test_vector_needs_print_path():
+    with pytest.raises(ValueError):
+        df.tail(10).dfi.export(
+            "tests/test_output/vector.pdf", table_conversion="html2image"
+        )
+
+
 @pytest.mark.parametrize("converter", converters)
 def test_latex(document_name, converter):
     if platform.system() == "Windows" and sys.version_info[:2] == (3, 12):
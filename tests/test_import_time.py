@@ -0,0 +1,52 @@
+import subprocess
+import sys
+
+# share of the import time spent in dataframe_image's own modules. pandas'
+# Styler module, needed to register `Styler.export_png`, imports matplotlib
+# and dominates the rest, dataframe_image itself takes about 1%.
+IMPORT_TIME_BUDGET = 0.1
+
+# only loaded when a conversion needs them
+LAZY_MODULES = (
+    "dataframe_image.converter.browser.",
+    "dataframe_image.converter.matplotlib_table",
+    "dataframe_image._convert",
+    "nbconvert",
+    "playwright",
+    "selenium",
+    "html2image",
+    "tornado",
+)
+
+
+def import_times(statement):
+    """Return the self import time in microseconds of each imported module."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(self_us)
+    return times
+
+
+def test_import_does_not_load_converters():
+    modules = import_times("import dataframe_image")
+    assert "dataframe_image" in modules
+    assert not [name for name in modules if name.startswith(LAZY_MODULES)]
+
+
+def test_import_time_budget():
+    modules = import_times("import dataframe_image")
+    own_us = sum(
+        t
+        for name, t in modules.items()
+        if name == "dataframe_image" or name.startswith("dataframe_image.")
+    )
+    assert own_us < IMPORT_TIME_BUDGET * sum(modules.values())
@@ -0,0 +1,77 @@
+from dataframe_image.converter.browser import base, mathjax
+from dataframe_image.converter.browser.base import BrowserConverter
+from dataframe_image.converter.browser.mathjax import MATHJAX_CDN, find_mathjax
+
+
+def test_mathjax_only_injected_for_math():
+    converter = BrowserConverter(use_mathjax=True)
+    assert "MathJax" not in converter.get_css("<table><td>1.5</td></table>")
+    assert "MathJax" in converter.get_css(r"<table><td>$x^2$</td></table>")
+    assert "MathJax" in converter.get_css(r"<table><td>\(x^2\)</td></table>")
+    assert "MathJax" not in BrowserConverter().get_css("<td>$x^2$</td>")
+
+
+def test_local_mathjax_is_inlined(tmp_path, monkeypatch):
+    bundle = tmp_path / "es5" / "tex-svg.js"
+    bundle.parent.mkdir()
+    bundle.write_text("window.MathJax = {version: 'local'}; '</script>';")
+    monkeypatch.setenv("DFI_MATHJAX_PATH", str(tmp_path))
+    assert find_mathjax() == bundle
+
+    css = BrowserConverter(use_mathjax=True).get_css("<td>$x$</td>")
+    assert "version: 'local'" in css
+    assert MATHJAX_CDN not in css
+    # the bundle cannot close the inline script
+    assert css.count("</script>") == 2
+
+
+class CountingConverter(BrowserConverter):
+    def __init__(self):
+        super().__init__(use_mathjax=True)
+        self.typeset = []
+
+    def typeset_formulas(self, formulas):
+        self.typeset.extend(formulas)
+        return {formula: f"<svg>{formula}</svg>" for formula in formulas}
+
+
+def test_formulas_are_typeset_once(monkeypatch):
+    monkeypatch.setattr(mathjax, "FORMULA_CACHE", mathjax.FormulaCache(maxsize=3))
+    monkeypatch.setattr(base, "FORMULA_CACHE", mathjax.FORMULA_CACHE)
+    converter = CountingConverter()
+    html = (
+        r"<th>$v$ [\(m/s\)]</th><td>$a &lt; b$</td><td>$v$</td><td>$5</td>"
+        r"<td>costs \$5 and \$6</td>"
+    )
+
+    first = converter.prerender_formulas(html)
+    second = converter.prerender_formulas(html)
+
+    assert first == second == (
+        "<th><svg>v</svg> [<svg>m/s</svg>]</th><td><svg>a < b</svg></td>"
+        "<td><svg>v</svg></td><td>$5</td><td>costs \\$5 and \\$6</td>"
+    )
+    assert sorted(converter.typeset) == ["a < b", "m/s", "v"]
+    # only the most recently used formulas are kept
+    converter.prerender_formulas("<td>$x$</td>")
+    assert list(mathjax.FORMULA_CACHE.svgs) == ["a < b", "v", "x"]
+
+
+def test_formulas_are_left_when_mathjax_does_not_load(monkeypatch):
+    from dataframe_image.converter.browser import playwright_converter
+
+    monkeypatch.setattr(playwright_converter, "FORMULA_CACHE", mathjax.FormulaCache())
+
+    class LoadError(Exception):
+        pass
+
+    class OfflinePage:
+        def set_content(self, html, timeout=30000):
+            self.timeout = timeout
+            raise LoadError("Timeout exceeded")
+
+    page = OfflinePage()
+    converter = playwright_converter.PlayWrightConverter(use_mathjax=True)
+    html = "<td>$x$</td>"
+    assert converter._prerender_formulas(page, html, LoadError) == html
+    assert page.timeout == playwright_converter.MATHJAX_LOAD_TIMEOUT
@@ -0,0 +1,192 @@
+import io
+
+import matplotlib as mpl
+import numpy as np
+import pandas as pd
+import pytest
+from matplotlib.backends.backend_agg import RendererAgg
+from matplotlib.figure import Figure
+from PIL import Image
+
+from dataframe_image.converter.matplotlib_table import (
+    MatplotlibTableConverter,
+    TextMeasurer,
+)
+from dataframe_image.converter.table_model import TableModel
+from dataframe_image.pd_html import styler2html
+
+
+@pytest.mark.parametrize("text", ["", "1.2345", "Hello World", "Über größe", r"$x^2$"])
+@pytest.mark.parametrize("weight", [None, "bold"])
+def test_text_measurer_matches_artist_width(text, weight):
+    fig = Figure(dpi=100)
+    renderer = RendererAgg(1, 1, 100)
+    t = fig.text(0, 0, text, size=14, weight=weight)
+    expected = t.get_window_extent(renderer=renderer).width
+
+    width = TextMeasurer(100).width(text, weight, 14)
+    # ascii advance widths may include side bearings but never under-measure
+    assert expected - 1 <= width <= expected + 8
+
+
+def test_style_index_resolves_styler_css():
+    df = pd.DataFrame({"a": [1, 2], "b": [3, 4]})
+    styler = df.style.apply(
+        lambda d: d.where(d != 4, "background-color: red").where(d == 4, ""), axis=None
+    )
+    styler = styler.set_table_styles([{"selector": "th", "props": "color: white"}])
+    model = TableModel.from_html(styler2html(styler))
+
+    assert model.num_header_rows == 1
+    assert model.style(0, 1).color == "white"
+    assert model.style(2, 2).background == "red"
+    assert model.style(1, 2).background is None
+
+
+@pytest.mark.parametrize(
+    "num_cols, fontsize, wrapped",
+    [
+        # wrapping alone fits the table, the font is not shrunk
+        (3, 22, ["lorem ipsum dolor sit amet consectetur", "adipiscing elit sed do"]),
+        (
+            6,
+            22 * 0.9**3,
+            ["lorem ipsum dolor sit amet", "consectetur adipiscing elit", "sed do"],
+        ),
+    ],
+)
+def test_document_table_is_wrapped_to_fit(num_cols, fontsize, wrapped):
+    words = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do"
+    df = pd.DataFrame({f"column {i}": [words] * 3 for i in range(num_cols)})
+    converter = MatplotlibTableConverter(fontsize=22, encode_base64=False)
+    converter.run(df.to_html())
+
+    assert sum(converter.col_widths) <= 1
+    assert converter.fontsize == pytest.approx(fontsize)
+    # the widest columns are wrapped first, wrapping stops once the table fits
+    assert converter.table.text[1, 1] == "\n".join(wrapped)
+
+
+@pytest.mark.parametrize("max_rows, max_cols", [(None, None), (4, None), (3, 2)])
+def test_table_model_from_frame_matches_html(max_rows, max_cols):
+    index = pd.MultiIndex.from_product([["A", "B"], [1, 2], ["u", "v"]], names=["x", None, "z"])
+    columns = pd.MultiIndex.from_tuples([("a", "p"), ("a", "q"), ("b", "p")], names=["c0", "c1"])
+    df = pd.DataFrame(np.arange(24.0).reshape(8, 3), index=index, columns=columns)
+    df.iloc[1, 1] = np.nan
+
+    expected = TableModel.from_html(
+        df.to_html(max_rows=max_rows, max_cols=max_cols, notebook=True)
+    )
+    model = TableModel.from_frame(df, max_rows=max_rows, max_cols=max_cols)
+
+    assert model.num_header_rows == expected.num_header_rows
+    assert (model.text == expected.text).all()
+    assert (model.rowspan == expected.rowspan).all()
+    assert (model.colspan == expected.colspan).all()
+    for i, j in np.ndindex(model.shape):
+        assert model.style(i, j) == expected.style(i, j)
+
+
+def test_table_model_from_styler_matches_html():
+    index = pd.MultiIndex.from_product([["A", "B"], [1, 2]], names=["x", "y"])
+    df = pd.DataFrame(np.arange(12.0).reshape(4, 3), index=index, columns=list("abc"))
+    styler = (
+        df.style.background_gradient()
+        .format("{:.1f}", subset=["a"])
+        .format(escape="html", subset=["c"])
+        .highlight_max(color="red")
+        .hide(axis=1, subset=["b"])
+        .set_caption("caption")
+    )
+
+    expected = TableModel.from_html(styler2html(styler))
+    model = TableModel.from_styler(styler)
+
+    assert model.num_header_rows == expected.num_header_rows
+    assert model.caption == expected.caption
+    assert (model.text == expected.text).all()
+    assert (model.rowspan == expected.rowspan).all()
+    for i, j in np.ndindex(model.shape):
+        style, expected_style = model.style(i, j), expected.style(i, j)
+        assert style.bold == expected_style.bold
+        for color, expected_color in [
+            (style.background, expected_style.background),
+            (style.color, expected_style.color),
+        ]:
+            assert (color is None) == (expected_color is None)
+            if color is not None:
+                assert mpl.colors.same_color(color, expected_color)
+
+
+@pytest.mark.parametrize(
+    "make_styler",
+    [
+        lambda df: df.style.background_gradient().highlight_max(),
+        lambda df: df.style.map(lambda v: "color: red" if v > 50 else "")
+        .background_gradient(axis=1)
+        .highlight_max(axis=None),
+        lambda df: df.style.background_gradient(subset=["a", "d"])
+        .hide(["r1", "r2"])
+        .hide(axis=1, subset=["b"]),
+    ],
+)
+def test_truncated_styler_matches_full_styles(make_styler):
+    df = pd.DataFrame(
+        np.random.default_rng(0).random((100, 6)) * 100,
+        index=[f"r{i}" for i in range(100)],
+        columns=list("abcdef"),
+    )
+    styler = make_styler(df)
+
+    full = TableModel.from_styler(styler)
+    model = TableModel.from_styler(styler, max_rows=10, max_cols=3)
+
+    assert model.shape == (12, 5)
+    assert (model.text[-1] == "...").all()
+    assert (model.text[1:, -1] == "...").all()
+    for i, j in np.ndindex(model.shape[0] - 1, model.shape[1] - 1):
+        assert model.text[i, j] == full.text[i, j]
+        assert model.style(i, j) == full.style(i, j)
+    # the html path truncates the same way
+    html_model = TableModel.from_html(styler2html(styler, max_rows=10, max_cols=3))
+    assert (html_model.text == model.text).all()
+
+
+def test_converter_reuses_canvas():
+    small = pd.DataFrame({"a": [1, 2]}).to_html()
+    large = pd.DataFrame({"a": range(10), "b": range(10)}).to_html()
+    converter = MatplotlibTableConverter(encode_base64=False, savefig_dpi=200)
+    first = converter.run(small)
+    canvas = converter.canvas
+    converter.run(large)
+
+    assert converter.run(small) == first
+    assert converter.canvas is canvas
+    img = Image.open(io.BytesIO(first))
+    assert img.format == "PNG"
+    assert img.size[1] == round(sum(converter.row_heights) * 200)
+
+
+@pytest.mark.parametrize(
+    "rc, format, corner",
+    [
+        ({}, "png", (255, 255, 255)),
+        ({"savefig.facecolor": "red"}, "png", (255, 0, 0)),
+        ({"savefig.transparent": True}, "png", (255, 255, 255, 0)),
+        ({"savefig.transparent": True}, "jpg", (255, 255, 255)),
+    ],
+)
+def test_converter_applies_savefig_colors(rc, format, corner):
+    html = pd.DataFrame({"a": [1, 2]}).to_html()
+    converter = MatplotlibTableConverter(
+        encode_base64=False, for_document=False, format=format
+    )
+    with mpl.rc_context(rc):
+        data = converter.run(html)
+
+    img = Image.open(io.BytesIO(data))
+    pixel = img.getpixel((0, 0))
+    if format == "jpg":
+        assert all(abs(a - b) <= 2 for a, b in zip(pixel, corner))
+    else:
+        assert pixel == corner
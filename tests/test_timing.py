@@ -0,0 +1,63 @@
+import logging
+import subprocess
+import sys
+from io import BytesIO
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import dataframe_image as dfi
+
+df = pd.DataFrame({"a": range(10), "b": list("abcdefghij")})
+
+
+def test_export_returns_phase_timings():
+    stats = dfi.export(df, BytesIO(), table_conversion="matplotlib")
+
+    assert isinstance(stats, dfi.ExportStats)
+    for phase in ["generate_table", "layout", "draw", "encode", "convert", "save_image"]:
+        assert stats.counts[phase] == 1
+        assert stats.timings[phase] >= 0
+    assert stats.timings["convert"] >= stats.timings["draw"]
+
+
+def test_collect_stats_aggregates_exports():
+    with dfi.collect_stats() as stats:
+        dfi.export(df, BytesIO(), table_conversion="matplotlib")
+        dfi.export(df.style, BytesIO(), table_conversion="matplotlib")
+
+    assert stats.counts["convert"] == 2
+
+
+def test_timings_are_logged_with_env_switch(monkeypatch, caplog):
+    caplog.set_level(logging.INFO, logger="dataframe_image.logger")
+    dfi.export(df, BytesIO(), table_conversion="matplotlib")
+    assert "timings" not in caplog.text
+
+    monkeypatch.setenv("DFI_TIMINGS", "1")
+    dfi.export(df, BytesIO(), table_conversion="matplotlib")
+    assert "export timings: ExportStats(" in caplog.text
+
+
+def test_collect_stats_accounts_resources():
+    with dfi.collect_stats(resources=True) as stats:
+        dfi.export(df, BytesIO(), table_conversion="matplotlib")
+
+    assert stats.resources["python_peak"] > 0
+    assert stats.resources["bitmap_canvas"] > 0
+    assert "python_peak=" in repr(stats)
+
+
+def test_resources_are_off_by_default():
+    stats = dfi.export(df, BytesIO(), table_conversion="matplotlib")
+    assert stats.resources == {}
+
+
+@pytest.mark.skipif(not Path("/proc/self/stat").exists(), reason="needs /proc")
+def test_collect_stats_polls_child_processes():
+    code = "import time; data = bytearray(64 * 2**20); time.sleep(0.5)"
+    with dfi.collect_stats(resources=True) as stats:
+        subprocess.run([sys.executable, "-c", code], check=True)
+
+    assert stats.resources["child_rss_peak"] > 64 * 2**20